@@ -1,125 +1,609 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import pandas as pd
-import joblib
+import numpy as np
+import io
+import json
 import os
+import threading
+import time
+
+from batcher import MicroBatcher
+from metrics import MetricsRegistry, SharedMetrics, StageTimer, render_prometheus
+from model_bundle import load_serving_model
+from model_registry import ModelWatcher, activate, current_version, resolve as resolve_bundle
+from prediction_cache import create_cache, make_key
+from request_log import RequestLogger, get_logger
+from schema import FIELDS, ValidationError, build_batch_frame, check_values, null_errors, validate_record
+from sweep import Grid, axis_values, expand_values
+from units import convert_area_to_hectare, convert_yield, convert_yield_array
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Sampled JSON request logs: LOG_SAMPLE_RATE of successful requests, plus every
+# failed one and every request slower than LOG_SLOW_MS milliseconds
+request_log = RequestLogger(get_logger(),
+                            sample_rate=float(os.environ.get('LOG_SAMPLE_RATE', 0.01)),
+                            slow_ms=float(os.environ.get('LOG_SLOW_MS', 500)))
+
+# Request metrics: latency histograms per endpoint and stage (parse, build,
+# predict, serialize). Each worker writes its snapshot to METRICS_DIR and
+# /metrics sums them, so the numbers cover every gunicorn worker.
+metrics = MetricsRegistry()
+shared_metrics = SharedMetrics(metrics, os.environ.get('METRICS_DIR', 'data/metrics'),
+                               interval=float(os.environ.get('METRICS_FLUSH_INTERVAL', 1)))
+METRIC_DESCRIPTIONS = {
+    'yield_api_request_duration_seconds': 'Time from request start to response, by endpoint and status.',
+    'yield_api_stage_duration_seconds': 'Time spent in each request stage, by endpoint.',
+    'yield_api_requests_total': 'Requests served, by endpoint and status.',
+    'yield_api_prediction_cache_total': 'Single-record prediction cache lookups, by result.'
+}
+
+INDEX = {
+    'message': 'Yield Prediction API is running',
+    'endpoints': {
+        'predict': '/predict',
+        'predict_batch': '/predict/batch',
+        'predict_sweep': '/predict/sweep',
+        'stats': '/stats',
+        'health': '/health',
+        'metrics': '/metrics',
+        'admin_reload': '/admin/reload'
+    }
+}
+
 @app.route('/', methods=['GET'])
 def index():
-    return jsonify({
-        'message': 'Yield Prediction API is running',
-        'endpoints': {
-            'predict': '/predict',
-            'health': '/health'
-        }
-    }), 200
+    return jsonify(INDEX), 200
 
 # Load Model & Pipeline
+# MODEL_FORMAT=auto serves the current version of the model registry written by
+# train_pipeline.py (native booster + JSON manifest, no unpickling) and falls
+# back to the pickle when there is none.
 MODEL_PATH = 'models/crop_yield_xgb.pkl'
+MODEL_REGISTRY = os.environ.get('MODEL_REGISTRY', 'models/crop_yield_xgb')
+MODEL_FORMAT = os.environ.get('MODEL_FORMAT', 'auto')
+
+# NumPy-only export of the model (edge_model.py): served with MODEL_FORMAT=edge,
+# and loaded instead when the bundle / pickle cannot be (e.g. no XGBoost installed)
+EDGE_MODEL_PATH = os.environ.get('EDGE_MODEL_PATH', 'models/crop_yield_edge.npz')
+
+# Precompiled encoder + raw booster for low-latency scoring of the pickled
+# pipeline (set FAST_INFERENCE=0 to disable; bundles are always compiled)
+FAST_INFERENCE = os.environ.get('FAST_INFERENCE', '1') != '0'
+
+# LAZY_MODEL_LOAD=1 defers loading to the first request so workers boot fast.
+# Leave it off with gunicorn's preload_app (gunicorn.conf.py): the model is
+# then loaded once in the master and its pages are shared by every worker.
+LAZY_MODEL_LOAD = os.environ.get('LAZY_MODEL_LOAD', '0') == '1'
+
+# Each worker polls the registry's `current` pointer every MODEL_RELOAD_INTERVAL
+# seconds (0 disables) and hot-swaps to the version it names. POST /admin/reload
+# does the same on demand and needs the X-Admin-Token header to match ADMIN_TOKEN.
+MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', 5))
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+serving_model = None
+_model_lock = threading.Lock()
+
+
+def load_model(version=None):
+    bundle_path = MODEL_REGISTRY if MODEL_FORMAT in ('pickle', 'edge') else resolve_bundle(MODEL_REGISTRY, version)
+    # The edge fallback only holds the version it was exported from, so a reload
+    # to a named version fails instead of falling back
+    edge_path = EDGE_MODEL_PATH if version is None or MODEL_FORMAT == 'edge' else None
+    return load_serving_model(bundle_path, MODEL_PATH, MODEL_FORMAT, FAST_INFERENCE, edge_path)
+
+
+def get_model():
+    global serving_model
+    if serving_model is None:
+        with _model_lock:
+            if serving_model is None:
+                serving_model = load_model()
+    return serving_model
+
 
-if os.path.exists(MODEL_PATH):
-    model_pipeline = joblib.load(MODEL_PATH)
-    print(f"XGBoost Pipeline loaded successfully from {MODEL_PATH}")
-else:
-    model_pipeline = None
-    print(f"Error: Model file not found at {MODEL_PATH}")
+def reload_model(version=None):
+    """Load and warm a model off the request path, then swap it in.
+
+    Handlers hold on to the model they fetched at the start of a request,
+    so in-flight requests finish on the old version.
+    """
+    global serving_model
+    with _model_lock:
+        model = load_model(version)
+        if model is None:
+            raise ValueError('No model found to load')
+        serving_model = model
+    request_log.event('model_swapped', version=model.version, source=model.source,
+                      load_seconds=round(model.load_seconds, 3))
+    return model
+
+
+model_watcher = ModelWatcher(
+    MODEL_REGISTRY, reload_model,
+    lambda: serving_model.version if serving_model is not None else None,
+    interval=MODEL_RELOAD_INTERVAL
+) if MODEL_RELOAD_INTERVAL > 0 and MODEL_FORMAT not in ('pickle', 'edge') else None
+
+if not LAZY_MODEL_LOAD:
+    get_model()
+
+
+@app.before_request
+def start_request():
+    # Background threads start from the first request, not at import, so a
+    # preloading gunicorn master never runs them and each forked worker gets its own
+    if model_watcher is not None:
+        model_watcher.ensure_started()
+    shared_metrics.ensure_started()
+    g.timer = StageTimer(metrics, 'yield_api_stage_duration_seconds', endpoint=request.endpoint or 'unmatched')
+    g.log_fields = {}
+
+
+@app.after_request
+def finish_request(response):
+    timer = g.get('timer')
+    if timer is None:
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    status = response.status_code
+    duration = timer.elapsed()
+    metrics.histogram('yield_api_request_duration_seconds', endpoint=endpoint, status=status).observe(duration)
+    metrics.inc('yield_api_requests_total', endpoint=endpoint, status=status)
+    request_log.request(endpoint, status, duration * 1e3,
+                        stages_ms={k: round(v * 1e3, 3) for k, v in timer.stages.items()},
+                        **g.get('log_fields', {}))
+    return response
 
 # Column metadata no longer needed as Pipeline handles it via ColumnTransformer
 
+MAX_BATCH_RECORDS = 100000
+
+# /predict/sweep: grids above SWEEP_MAX_POINTS are rejected; grids above
+# SWEEP_CHUNK_SIZE are scored and streamed as NDJSON one chunk at a time.
+SWEEP_MAX_POINTS = int(os.environ.get('SWEEP_MAX_POINTS', 1000000))
+SWEEP_CHUNK_SIZE = int(os.environ.get('SWEEP_CHUNK_SIZE', 10000))
+SWEEP_OBJECTIVES = ('Yield_per_Hectare', 'Total_Yield')
+
+
+def score_record(model, record):
+    if batcher is not None:
+        # Coalesced with other in-flight requests into one model call, on this request's model
+        return float(batcher.predict(record, model))
+    return model.predict_row(record)
+
+
+def predict_records(model, records):
+    return model.predict_records(records)
+
+
+# Optional micro-batching of concurrent /predict calls (needs a threaded server,
+# e.g. gunicorn --threads 8). Flushes at MICRO_BATCH_MAX_SIZE rows or after
+# MICRO_BATCH_MAX_WAIT_US microseconds, whichever comes first.
+MICRO_BATCHING = os.environ.get('MICRO_BATCHING', '0') == '1'
+batcher = MicroBatcher(
+    predict_records,
+    max_batch_size=int(os.environ.get('MICRO_BATCH_MAX_SIZE', 64)),
+    max_wait_us=int(os.environ.get('MICRO_BATCH_MAX_WAIT_US', 2000))
+) if MICRO_BATCHING else None
+
+# Cache of per-hectare predictions keyed on the model's own input features, so
+# repeat requests that only change Area or units skip the model entirely.
+# PREDICTION_CACHE=memory (per worker), sqlite (shared by all workers) or off.
+prediction_cache = create_cache(
+    os.environ.get('PREDICTION_CACHE', 'memory'),
+    max_size=int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 3600)),
+    path=os.environ.get('PREDICTION_CACHE_PATH', 'data/prediction_cache.sqlite')
+)
+
+
+def build_input_record(data, optional=()):
+    """Validated model input for one request (Area in hectares); raises schema.ValidationError."""
+    record = validate_record(data, optional)
+    record['Area'] = convert_area_to_hectare(record['Area'], record.pop('Area_Unit'))
+    del record['Yield_Unit']
+    return record
+
+
+def cached_prediction(model, record):
+    """(cache key, cached per-hectare prediction or None); the key is None when caching is off."""
+    if prediction_cache is None:
+        return None, None
+    cache_key = make_key(record, model.input_columns, namespace=model.cache_namespace)
+    prediction_per_ha = prediction_cache.get(cache_key)
+    metrics.inc('yield_api_prediction_cache_total', result='miss' if prediction_per_ha is None else 'hit')
+    return cache_key, prediction_per_ha
+
+
+def format_prediction(prediction_per_ha, area_ha, yield_unit):
+    total_yield_tons = prediction_per_ha * area_ha
+    final_yield_per_ha = convert_yield(prediction_per_ha, yield_unit)
+    final_total_yield = convert_yield(total_yield_tons, yield_unit)
+    return {
+        'Yield_per_Hectare': float(round(final_yield_per_ha, 3)),
+        'Total_Yield': float(round(final_total_yield, 3)),
+        'Yield_Unit': yield_unit,
+        'Area_in_Hectares': float(round(area_ha, 3))
+    }
+
+
+def parse_batch_body(body, content_type, filename=''):
+    """Read /predict/batch input (bytes) as a DataFrame plus any per-line parse errors.
+
+    Accepts a JSON array (or {"records": [...]}), NDJSON, or CSV, chosen by the
+    content type or an uploaded file's name. Shared by the Flask and ASGI apps.
+    """
+    parse_errors = {}
+    if 'csv' in content_type or filename.endswith('.csv'):
+        return pd.read_csv(io.BytesIO(body)), parse_errors
+
+    if 'ndjson' in content_type or 'jsonlines' in content_type or filename.endswith(('.ndjson', '.jsonl')):
+        records = []
+        for line in body.decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            errors = null_errors(record) if isinstance(record, dict) else {'record': 'is not a valid JSON object'}
+            if errors:
+                parse_errors[len(records)] = errors
+            records.append(record if isinstance(record, dict) else {})
+        return pd.DataFrame.from_records(records, index=range(len(records))), parse_errors
+
+    payload = json.loads(body)
+    records = payload.get('records') if isinstance(payload, dict) else payload
+    if not isinstance(records, list):
+        raise ValueError('Expected a JSON array of records')
+    for i, record in enumerate(records):
+        errors = null_errors(record) if isinstance(record, dict) else {'record': 'is not a JSON object'}
+        if errors:
+            parse_errors[i] = errors
+    records = [r if isinstance(r, dict) else {} for r in records]
+    return pd.DataFrame.from_records(records, index=range(len(records))), parse_errors
+
+
+def read_batch_request():
+    """parse_batch_body for the current Flask request (raw body or a 'file' upload)."""
+    upload = request.files.get('file')
+    if upload:
+        return parse_batch_body(upload.read(), upload.mimetype or '', upload.filename or '')
+    return parse_batch_body(request.get_data(), request.mimetype or '')
 
-def convert_area_to_hectare(area, unit):
-    unit = unit.lower()
-    if unit == 'hectare':
-        return area
-    elif unit == 'acre':
-        return area * 0.404686
-    elif unit == 'sq_meter':
-        return area * 0.0001
-    else:
-        return area  # Default or throw error
-
-def convert_yield(yield_val, target_unit):
-    # yield_val is in tons/ha
-    target_unit = target_unit.lower()
-    
-    if target_unit == 'ton':
-        return yield_val
-    elif target_unit == 'kg':
-        return yield_val * 1000
-    elif target_unit == 'quintal':
-        return yield_val * 10
-    else:
-        return yield_val
 
 @app.route('/predict', methods=['POST'])
 def predict():
-    if not model_pipeline:
+    model = get_model()
+    if model is None:
         return jsonify({'error': 'Model not loaded'}), 500
         
     try:
         data = request.json
-        print("Received data:", data)
-        
-        # 1. Parse and Validate Input
-        # Required fields check could be added here
-        
-        # 2. Prepare Input DataFrame
-        input_data = {
-            'Crop_Type': data.get('Crop_Type'),
-            'Nitrogen': float(data.get('Nitrogen', 0)),
-            'Phosphorus': float(data.get('Phosphorus', 0)),
-            'Potassium': float(data.get('Potassium', 0)),
-            'Soil_pH': float(data.get('Soil_pH', 6.5)),
-            'Soil_Moisture': float(data.get('Soil_Moisture', 50)),
-            'Soil_Type': data.get('Soil_Type'),
-            'Temperature': float(data.get('Temperature', 25)),
-            'Rainfall': float(data.get('Rainfall', 100)),
-            'Humidity': float(data.get('Humidity', 60)),
-            'Sunlight_Hours': float(data.get('Sunlight_Hours', 8)),
-            'Fertilizer_Type': data.get('Fertilizer_Type', 'None'),
-            'Fertilizer_Dosage': float(data.get('Fertilizer_Dosage', 0)),
-            'Irrigation_Method': data.get('Irrigation_Method'),
-            'Growth_Duration': float(data.get('Growth_Duration', 120)),
-            'Season': data.get('Season'),
-            'Area': convert_area_to_hectare(float(data.get('Area', 1)), data.get('Area_Unit', 'Hectare'))
-        }
-        
-        # Create DataFrame
-        df = pd.DataFrame([input_data])
+        g.log_fields['input'] = data
         
-        # 3. Predict Yield per Hectare
-        # The pipeline handles scaling and one-hot encoding internally
-        prediction_per_ha = model_pipeline.predict(df)[0]
+        g.timer.lap('parse')
         
-        # 4. Calculate Total Yield
-        area_ha = input_data['Area']
-        total_yield_tons = prediction_per_ha * area_ha
+        # 1-2. Validate against the schema and build the model input
+        input_data = build_input_record(data)
+        g.timer.lap('build')
         
-        # 5. Unit Conversion
-        yield_unit = data.get('Yield_Unit', 'Ton')
+        # 3. Predict Yield per Hectare (cached on the model's input features)
+        cache_key, prediction_per_ha = cached_prediction(model, input_data)
+        if prediction_per_ha is None:
+            prediction_per_ha = score_record(model, input_data)
+            if cache_key is not None:
+                prediction_cache.set(cache_key, prediction_per_ha)
+        g.timer.lap('predict')
         
-        final_yield_per_ha = convert_yield(prediction_per_ha, yield_unit)
-        final_total_yield = convert_yield(total_yield_tons, yield_unit)
-        
-        response = {
-            'Yield_per_Hectare': float(round(final_yield_per_ha, 3)),
-            'Total_Yield': float(round(final_total_yield, 3)),
-            'Yield_Unit': yield_unit,
-            'Area_in_Hectares': float(round(area_ha, 3))
-        }
-        
-        return jsonify(response)
+        # 4-5. Total Yield and Unit Conversion
+        response = jsonify(format_prediction(prediction_per_ha, input_data['Area'],
+                                             data.get('Yield_Unit', 'Ton')))
+        g.timer.lap('serialize')
+        return response
 
+    except ValidationError as e:
+        g.log_fields['error'] = str(e)
+        return jsonify({'error': str(e), 'errors': e.errors}), 400
     except Exception as e:
-        print("Error during prediction:", e)
+        g.log_fields['error'] = str(e)
         return jsonify({'error': str(e)}), 400
 
+def score_batch(model, raw, errors, timer, log_fields):
+    """Score a parsed /predict/batch request -> (response payload, status).
+
+    timer is the request's StageTimer and log_fields its log dict; shared by
+    the Flask and ASGI apps.
+    """
+    log_fields['records'] = len(raw)
+    if len(raw) > MAX_BATCH_RECORDS:
+        return {'error': f'Batch too large: {len(raw)} records (max {MAX_BATCH_RECORDS})'}, 413
+
+    try:
+        # 1. Vectorized validation; bad records are reported, not fatal
+        raw = raw.reset_index(drop=True)
+        df, area_units, yield_units, field_errors = build_batch_frame(raw)
+        for i, fields in field_errors.items():
+            # Records that could not be parsed only report the parse error
+            if 'record' not in errors.get(i, {}):
+                errors[i] = dict(fields, **errors.get(i, {}))
+
+        valid = np.ones(len(df), dtype=bool)
+        valid[list(errors)] = False
+        timer.lap('build')
+
+        # 2. One model call for every valid record
+        prediction_per_ha = np.full(len(df), np.nan)
+        if valid.any():
+            prediction_per_ha[valid] = model.predict(df[valid])
+        timer.lap('predict')
+        log_fields['failed'] = int((~valid).sum())
+
+        # 3. Totals and unit conversion over the whole batch
+        area_ha = df['Area'].to_numpy()
+        final_yield_per_ha = np.round(convert_yield_array(prediction_per_ha, yield_units), 3)
+        final_total_yield = np.round(convert_yield_array(prediction_per_ha * area_ha, yield_units), 3)
+        area_ha = np.round(area_ha, 3)
+
+        results = []
+        for i in range(len(df)):
+            if valid[i]:
+                results.append({
+                    'index': i,
+                    'Yield_per_Hectare': float(final_yield_per_ha[i]),
+                    'Total_Yield': float(final_total_yield[i]),
+                    'Yield_Unit': yield_units[i],
+                    'Area_in_Hectares': float(area_ha[i])
+                })
+            else:
+                results.append({'index': i, 'errors': errors[i]})
+
+        return {
+            'count': len(df),
+            'succeeded': int(valid.sum()),
+            'failed': int((~valid).sum()),
+            'results': results
+        }, 200
+
+    except Exception as e:
+        log_fields['error'] = str(e)
+        return {'error': str(e)}, 400
+
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    model = get_model()
+    if model is None:
+        return jsonify({'error': 'Model not loaded'}), 500
+
+    try:
+        raw, errors = read_batch_request()
+    except Exception as e:
+        g.log_fields['error'] = str(e)
+        return jsonify({'error': str(e)}), 400
+    g.timer.lap('parse')
+
+    payload, status = score_batch(model, raw, errors, g.timer, g.log_fields)
+    response = jsonify(payload)
+    g.timer.lap('serialize')
+    return response, status
+
+def build_sweep_grid(data):
+    """Base record plus varied-field axes -> (Grid, yield unit, objective); raises ValueError."""
+    base = data.get('base') or {}
+    vary = data.get('vary')
+    if not isinstance(base, dict):
+        raise ValueError("'base' must be an object")
+    if not isinstance(vary, dict) or not vary:
+        raise ValueError("'vary' must map at least one field to a list or range of values")
+
+    # Varied fields may be left out of the base record, even required ones
+    record = build_input_record(base, optional=list(vary))
+    axes = {}
+    for name, spec in vary.items():
+        if name not in FIELDS:
+            raise ValueError(f"Unknown field '{name}'")
+        axes[name] = expand_values(name, spec, numeric=FIELDS[name]['type'] == 'number')
+        check_values(name, axes[name])
+    # The model reads Area in hectares; values and best.config are reported in the caller's Area_Unit
+    labels = {}
+    if 'Area' in axes:
+        labels['Area'] = axes['Area']
+        axes['Area'] = convert_area_to_hectare(axes['Area'], base.get('Area_Unit', 'Hectare'))
+
+    objective = data.get('objective', 'Yield_per_Hectare')
+    if objective not in SWEEP_OBJECTIVES:
+        raise ValueError(f"'objective' must be one of {', '.join(SWEEP_OBJECTIVES)}")
+    return Grid(record, axes, labels), base.get('Yield_Unit', 'Ton'), objective
+
+
+def score_sweep_chunk(model, grid, start, stop, yield_unit):
+    """One model call for grid positions [start, stop) -> (yield per ha, total yield) in yield_unit."""
+    df = grid.frame(start, stop)
+    prediction_per_ha = np.asarray(model.predict(df), dtype=np.float64)
+    return (convert_yield(prediction_per_ha, yield_unit),
+            convert_yield(prediction_per_ha * df['Area'].to_numpy(dtype=np.float64), yield_unit))
+
+
+def sweep_best(grid, position, yield_per_ha, total_yield):
+    return {
+        'index': int(position),
+        'config': grid.config(position),
+        'Yield_per_Hectare': float(round(yield_per_ha, 3)),
+        'Total_Yield': float(round(total_yield, 3))
+    }
+
+
+def stream_sweep(model, grid, yield_unit, objective, header):
+    """NDJSON lines: the header, one {offset, columns} line per chunk, then the best configuration."""
+    yield json.dumps(header) + '\n'
+    best = None
+    try:
+        for start, stop in grid.chunks(SWEEP_CHUNK_SIZE):
+            yield_per_ha, total_yield = score_sweep_chunk(model, grid, start, stop, yield_unit)
+            target = yield_per_ha if objective == 'Yield_per_Hectare' else total_yield
+            i = int(np.argmax(target))
+            if best is None or target[i] > best[0]:
+                best = (target[i], start + i, yield_per_ha[i], total_yield[i])
+            yield json.dumps({
+                'offset': start,
+                'Yield_per_Hectare': np.round(yield_per_ha, 3).tolist(),
+                'Total_Yield': np.round(total_yield, 3).tolist()
+            }) + '\n'
+        yield json.dumps({'best': sweep_best(grid, *best[1:])}) + '\n'
+    except Exception as e:
+        # Headers are already sent; report the failure in-band
+        yield json.dumps({'error': str(e)}) + '\n'
+
+
+def run_sweep(model, data, timer, log_fields):
+    """Handle a parsed /predict/sweep body.
+
+    Returns (payload, status), or (NDJSON line iterator, None) for a streamed
+    grid; shared by the Flask and ASGI apps.
+    """
+    try:
+        if not isinstance(data, dict):
+            raise ValueError('Expected a JSON object')
+        grid, yield_unit, objective = build_sweep_grid(data)
+    except ValidationError as e:
+        log_fields['error'] = str(e)
+        return {'error': str(e), 'errors': e.errors}, 400
+    except Exception as e:
+        log_fields['error'] = str(e)
+        return {'error': str(e)}, 400
+    log_fields['points'] = grid.size
+
+    if grid.size > SWEEP_MAX_POINTS:
+        return {'error': f'Grid too large: {grid.size} points (max {SWEEP_MAX_POINTS})'}, 413
+    timer.lap('build')
+
+    header = {
+        'fields': grid.fields,
+        'values': {name: axis_values(values) for name, values in zip(grid.fields, grid.labels)},
+        'shape': list(grid.shape),
+        'count': grid.size,
+        'Yield_Unit': yield_unit,
+        'objective': objective
+    }
+
+    if data.get('stream') or grid.size > SWEEP_CHUNK_SIZE:
+        log_fields['streamed'] = True
+        return stream_sweep(model, grid, yield_unit, objective, dict(header, chunk_size=SWEEP_CHUNK_SIZE)), None
+
+    try:
+        # One model call for the whole grid
+        yield_per_ha, total_yield = score_sweep_chunk(model, grid, 0, grid.size, yield_unit)
+        timer.lap('predict')
+
+        target = yield_per_ha if objective == 'Yield_per_Hectare' else total_yield
+        best = int(np.argmax(target))
+        return dict(
+            header,
+            Yield_per_Hectare=np.round(yield_per_ha, 3).tolist(),
+            Total_Yield=np.round(total_yield, 3).tolist(),
+            best=sweep_best(grid, best, yield_per_ha[best], total_yield[best])
+        ), 200
+
+    except Exception as e:
+        log_fields['error'] = str(e)
+        return {'error': str(e)}, 400
+
+
+@app.route('/predict/sweep', methods=['POST'])
+def predict_sweep():
+    """Score every combination of the varied fields over a base record.
+
+    Body: {"base": {...record...}, "vary": {"Nitrogen": {"start": 0, "stop": 200,
+    "step": 10}, "Irrigation_Method": ["Drip", "Flood"]}, "objective": ...}.
+    Results are columnar, in C order over "fields" (the last field varies
+    fastest). Grids larger than SWEEP_CHUNK_SIZE, or any grid with
+    "stream": true, come back as NDJSON chunks.
+    """
+    model = get_model()
+    if model is None:
+        return jsonify({'error': 'Model not loaded'}), 500
+
+    try:
+        data = request.get_json()
+    except Exception as e:
+        g.log_fields['error'] = str(e)
+        return jsonify({'error': str(e)}), 400
+    g.timer.lap('parse')
+
+    result, status = run_sweep(model, data, g.timer, g.log_fields)
+    if status is None:
+        return Response(result, mimetype='application/x-ndjson')
+    response = jsonify(result)
+    g.timer.lap('serialize')
+    return response, status
+
+def stats_payload():
+    return {
+        'micro_batching': batcher.stats() if batcher is not None else None,
+        'prediction_cache': prediction_cache.stats() if prediction_cache is not None else None,
+        'model_watcher': model_watcher.stats() if model_watcher is not None else None
+    }
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify(stats_payload()), 200
+
+def metrics_text():
+    return render_prometheus(shared_metrics.collect(), METRIC_DESCRIPTIONS)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics_text(), mimetype='text/plain; version=0.0.4')
+
+def health_payload():
+    model = serving_model
+    return {
+        'status': 'healthy',
+        'model': {
+            'version': model.version,
+            'source': model.source,
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(model.loaded_at)),
+            'load_seconds': round(model.load_seconds, 3)
+        } if model is not None else None
+    }
+
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'healthy'}), 200
+    return jsonify(health_payload()), 200
+
+def admin_reload_result(token, data, log_fields):
+    """POST /admin/reload -> (payload, status); shared by the Flask and ASGI apps."""
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        return {'error': 'Forbidden'}, 403
+
+    version = data.get('version') if isinstance(data, dict) else None
+    previous = serving_model.version if serving_model is not None else None
+    try:
+        # Load and warm the version first; a version that fails to load never becomes current
+        model = reload_model(version)
+        if version and current_version(MODEL_REGISTRY) is not None:
+            # Move the pointer too, so the other workers follow on their next poll
+            activate(MODEL_REGISTRY, version)
+    except Exception as e:
+        log_fields['error'] = str(e)
+        return {'error': str(e), 'version': previous}, 400
+
+    return {
+        'version': model.version,
+        'previous_version': previous,
+        'load_seconds': round(model.load_seconds, 3)
+    }, 200
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    payload, status = admin_reload_result(request.headers.get('X-Admin-Token'),
+                                          request.get_json(silent=True) or {}, g.log_fields)
+    return jsonify(payload), status
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+import app as wsgi
+from metrics import StageTimer
+from schema import ValidationError
+
+# ASGI entry point: the same API on an event loop (SERVER_MODE=asgi in
+# gunicorn.conf.py, or `uvicorn asgi_app:app`).
+#
+# Request bodies are read and parsed on the loop. Model calls go to a
+# bounded per-process thread pool sized to the cores, or, with
+# MICRO_BATCHING=1, straight onto the micro-batcher's queue, so one worker
+# keeps accepting connections while XGBoost (which releases the GIL) runs.
+# Model loading, the prediction cache, metrics and logs are shared with
+# app.py, and batch, sweep and reload share their handling code with the
+# Flask views, so both servers answer the same requests the same way.
+
+ASGI_MODEL_THREADS = int(os.environ.get('ASGI_MODEL_THREADS', 0)) or (
+    len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def model_pool():
+    # Created per process on first use, so a preloading master never starts threads
+    global _pool, _pool_pid
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _pool = ThreadPoolExecutor(max_workers=ASGI_MODEL_THREADS, thread_name_prefix='model')
+                _pool_pid = os.getpid()
+    return _pool
+
+
+async def run_in_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(model_pool(), fn, *args)
+
+
+def observed(endpoint):
+    """Wrap a handler(request, timer) with the request metrics and sampled log app.py records."""
+    def decorate(handler):
+        async def wrapped(request):
+            if wsgi.model_watcher is not None:
+                wsgi.model_watcher.ensure_started()
+            wsgi.shared_metrics.ensure_started()
+            timer = StageTimer(wsgi.metrics, 'yield_api_stage_duration_seconds', endpoint=endpoint)
+            log_fields = {}
+            response = await handler(request, timer, log_fields)
+            status = response.status_code
+            duration = timer.elapsed()
+            wsgi.metrics.histogram('yield_api_request_duration_seconds', endpoint=endpoint,
+                                   status=status).observe(duration)
+            wsgi.metrics.inc('yield_api_requests_total', endpoint=endpoint, status=status)
+            wsgi.request_log.request(endpoint, status, duration * 1e3,
+                                     stages_ms={k: round(v * 1e3, 3) for k, v in timer.stages.items()},
+                                     **log_fields)
+            return response
+        return wrapped
+    return decorate
+
+
+@observed('index')
+async def index(request, timer, log_fields):
+    return JSONResponse(wsgi.INDEX)
+
+
+@observed('health')
+async def health(request, timer, log_fields):
+    return JSONResponse(wsgi.health_payload())
+
+
+@observed('stats')
+async def stats(request, timer, log_fields):
+    return JSONResponse(wsgi.stats_payload())
+
+
+@observed('prometheus_metrics')
+async def prometheus_metrics(request, timer, log_fields):
+    # Reads every worker's snapshot file; keep the disk I/O off the loop
+    return PlainTextResponse(await run_in_pool(wsgi.metrics_text), media_type='text/plain; version=0.0.4')
+
+
+def _score(model, record):
+    cache_key, prediction_per_ha = wsgi.cached_prediction(model, record)
+    if prediction_per_ha is None:
+        prediction_per_ha = model.predict_row(record)
+        if cache_key is not None:
+            wsgi.prediction_cache.set(cache_key, prediction_per_ha)
+    return prediction_per_ha
+
+
+@observed('predict')
+async def predict(request, timer, log_fields):
+    model = wsgi.get_model()
+    if model is None:
+        return JSONResponse({'error': 'Model not loaded'}, status_code=500)
+
+    try:
+        data = json.loads(await request.body())
+        log_fields['input'] = data
+        timer.lap('parse')
+
+        input_data = wsgi.build_input_record(data)
+        timer.lap('build')
+
+        if wsgi.batcher is not None:
+            # Coalesced with other in-flight requests without holding a pool thread
+            cache_key, prediction_per_ha = wsgi.cached_prediction(model, input_data)
+            if prediction_per_ha is None:
+                prediction_per_ha = float(await asyncio.wrap_future(wsgi.batcher.submit(input_data, model)))
+                if cache_key is not None:
+                    wsgi.prediction_cache.set(cache_key, prediction_per_ha)
+        else:
+            prediction_per_ha = await run_in_pool(_score, model, input_data)
+        timer.lap('predict')
+
+        response = JSONResponse(wsgi.format_prediction(prediction_per_ha, input_data['Area'],
+                                                       data.get('Yield_Unit', 'Ton')))
+        timer.lap('serialize')
+        return response
+
+    except ValidationError as e:
+        log_fields['error'] = str(e)
+        return JSONResponse({'error': str(e), 'errors': e.errors}, status_code=400)
+    except Exception as e:
+        log_fields['error'] = str(e)
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+
+async def _iterate_in_pool(iterable):
+    iterator = iter(iterable)
+    sentinel = object()
+    while True:
+        chunk = await run_in_pool(next, iterator, sentinel)
+        if chunk is sentinel:
+            break
+        yield chunk
+
+
+@observed('predict_batch')
+async def predict_batch(request, timer, log_fields):
+    model = wsgi.get_model()
+    if model is None:
+        return JSONResponse({'error': 'Model not loaded'}, status_code=500)
+
+    try:
+        content_type = request.headers.get('content-type', '')
+        if content_type.startswith('multipart/form-data'):
+            form = await request.form()
+            upload = form.get('file')
+            if upload is None or isinstance(upload, str):
+                raise ValueError("Expected a 'file' upload")
+            body, content_type, filename = await upload.read(), upload.content_type or '', upload.filename or ''
+        else:
+            body, filename = await request.body(), ''
+        # CSV and large JSON bodies are too slow to parse on the loop
+        raw, errors = await run_in_pool(wsgi.parse_batch_body, body, content_type, filename)
+    except Exception as e:
+        log_fields['error'] = str(e)
+        return JSONResponse({'error': str(e)}, status_code=400)
+    timer.lap('parse')
+
+    payload, status = await run_in_pool(wsgi.score_batch, model, raw, errors, timer, log_fields)
+    response = JSONResponse(payload, status_code=status)
+    timer.lap('serialize')
+    return response
+
+
+@observed('predict_sweep')
+async def predict_sweep(request, timer, log_fields):
+    model = wsgi.get_model()
+    if model is None:
+        return JSONResponse({'error': 'Model not loaded'}, status_code=500)
+
+    try:
+        data = json.loads(await request.body())
+    except Exception as e:
+        log_fields['error'] = str(e)
+        return JSONResponse({'error': str(e)}, status_code=400)
+    timer.lap('parse')
+
+    result, status = await run_in_pool(wsgi.run_sweep, model, data, timer, log_fields)
+    if status is None:
+        # Each chunk is scored in the pool as the client reads it
+        return StreamingResponse(_iterate_in_pool(result), media_type='application/x-ndjson')
+    response = JSONResponse(result, status_code=status)
+    timer.lap('serialize')
+    return response
+
+
+@observed('admin_reload')
+async def admin_reload(request, timer, log_fields):
+    try:
+        data = json.loads(await request.body() or b'{}')
+    except ValueError:
+        data = {}
+    # Loading and warming a bundle blocks; keep it off the loop
+    payload, status = await run_in_pool(wsgi.admin_reload_result, request.headers.get('x-admin-token'),
+                                        data, log_fields)
+    return JSONResponse(payload, status_code=status)
+
+
+app = Starlette(routes=[
+    Route('/', index, methods=['GET']),
+    Route('/health', health, methods=['GET']),
+    Route('/stats', stats, methods=['GET']),
+    Route('/metrics', prometheus_metrics, methods=['GET']),
+    Route('/predict', predict, methods=['POST']),
+    Route('/predict/batch', predict_batch, methods=['POST']),
+    Route('/predict/sweep', predict_sweep, methods=['POST']),
+    Route('/admin/reload', admin_reload, methods=['POST'])
+], middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])])
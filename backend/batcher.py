@@ -0,0 +1,118 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import Histogram, exponential_buckets
+
+# In-process dynamic batching for concurrent single-row requests.
+#
+# Request threads enqueue a record, with the model they fetched, and block on
+# a Future. One worker thread collects records until either max_batch_size is
+# reached or the oldest record has waited max_wait_us, scores the batch with
+# one model call per distinct model (normally one; two around a hot swap) and
+# resolves every Future. A request is always scored by its own model, so an
+# in-flight request never finishes on a version swapped in after it started.
+# Only useful when a worker serves several requests at once (gunicorn
+# --threads N, or the ASGI entry point).
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_us=2000):
+        # predict_fn(model, list_of_records) -> sequence of predictions, same order
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_us / 1e6
+
+        self.batch_sizes = Histogram(exponential_buckets(1, 2, 12))             # 1 .. 2048 rows
+        self.queue_wait_us = Histogram(exponential_buckets(10, 2, 16))          # 10us .. ~0.3s
+        self.flush_duration_us = Histogram(exponential_buckets(10, 2, 16))
+        self.flushes_full = 0
+        self.flushes_timeout = 0
+        self.batch_failures = 0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so (re)start lazily in each gunicorn worker
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, name='micro-batcher', daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, record, model):
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((time.perf_counter(), model, record, future))
+        return future
+
+    def predict(self, record, model, timeout=10.0):
+        return self.submit(record, model).result(timeout=timeout)
+
+    def _collect(self, q):
+        first = q.get()
+        batch = [first]
+        deadline = first[0] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        q = self._queue
+        while True:
+            batch = self._collect(q)
+            start = time.perf_counter()
+            if len(batch) >= self.max_batch_size:
+                self.flushes_full += 1
+            else:
+                self.flushes_timeout += 1
+            self.batch_sizes.observe(len(batch))
+            for enqueued, _, _, _ in batch:
+                self.queue_wait_us.observe((start - enqueued) * 1e6)
+
+            groups = {}
+            for _, model, record, future in batch:
+                groups.setdefault(id(model), (model, []))[1].append((record, future))
+            for model, items in groups.values():
+                self._flush(model, items)
+            self.flush_duration_us.observe((time.perf_counter() - start) * 1e6)
+
+    def _flush(self, model, items):
+        try:
+            predictions = self.predict_fn(model, [record for record, _ in items])
+        except Exception:
+            # Isolate the offending record(s) instead of failing the whole batch
+            self.batch_failures += 1
+            for record, future in items:
+                try:
+                    future.set_result(self.predict_fn(model, [record])[0])
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        for (_, future), prediction in zip(items, predictions):
+            future.set_result(prediction)
+
+    def stats(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_us': self.max_wait * 1e6,
+            'queue_depth': self._queue.qsize(),
+            'flushes_full': self.flushes_full,
+            'flushes_timeout': self.flushes_timeout,
+            'batch_failures': self.batch_failures,
+            'batch_size': self.batch_sizes.snapshot(),
+            'queue_wait_us': self.queue_wait_us.snapshot(),
+            'flush_duration_us': self.flush_duration_us.snapshot()
+        }
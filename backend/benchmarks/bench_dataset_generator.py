@@ -0,0 +1,108 @@
+"""Rows/sec of the vectorized dataset generator against the original per-row loop.
+
+Run from backend/:  python -m benchmarks.bench_dataset_generator [--rows N]
+
+Also compares per-column distributions (mean / std, category frequencies) so
+a rewrite that changes the data, not just the speed, shows up here.
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_generator import (CROPS, CROP_PROFILE, CROP_POTENTIAL, SOIL_TYPES, SEASONS,
+                               IRRIGATION_METHODS, FERTILIZER_TYPES, COLUMNS, generate_chunk)
+
+
+def legacy_rows(num_rows):
+    """The original pure-Python loop, kept only as the benchmark baseline."""
+    data = []
+    for _ in range(num_rows):
+        crop = random.choice(CROPS)
+        profile = CROP_PROFILE[crop]
+        n = max(0, int(np.random.normal(profile['N'], 20)))
+        p = max(0, int(np.random.normal(profile['P'], 15)))
+        k = max(0, int(np.random.normal(profile['K'], 15)))
+        ph = max(4.0, min(10.0, np.random.normal(profile['pH'], 0.5)))
+        moisture = max(20, min(100, np.random.normal(profile['Moisture'], 10)))
+        temp = max(10, min(45, np.random.normal(profile['Temp'], 5)))
+        rainfall = max(0, np.random.normal(profile['Rainfall'], 50))
+        humidity = max(20, min(100, np.random.normal(profile['Humidity'], 10)))
+        sunlight = max(2, min(14, np.random.normal(8, 2)))
+        soil = random.choice(SOIL_TYPES)
+        season = random.choice(SEASONS)
+        irrigation = random.choice(IRRIGATION_METHODS)
+        fertilizer = random.choice(FERTILIZER_TYPES)
+        dosage = max(0, np.random.normal(100, 30)) if fertilizer != 'None' else 0
+        area = round(random.uniform(0.5, 20.0), 2)
+        growth_days = int(np.random.normal(120, 20))
+
+        nutrient_score = 1.0
+        if n < profile['N'] * 0.7: nutrient_score -= 0.1
+        if p < profile['P'] * 0.7: nutrient_score -= 0.05
+        if k < profile['K'] * 0.7: nutrient_score -= 0.05
+        weather_score = 1.0
+        if abs(temp - profile['Temp']) > 5: weather_score -= 0.2
+        if moisture < profile['Moisture'] * 0.6: weather_score -= 0.2
+        if rainfall < profile['Rainfall'] * 0.5 and irrigation == 'Rainfed': weather_score -= 0.4
+        fert_boost = min(0.3, (dosage / 200.0) * 0.3) if fertilizer != 'None' else 0
+        irri_boost = 0.2 if irrigation in ['Drip', 'Sprinkler'] else 0.1 if irrigation == 'Flood' else 0.0
+        noise = np.random.normal(0, 0.5)
+        yield_per_ha = max(0.1, CROP_POTENTIAL[crop] * nutrient_score * weather_score
+                           * (1 + fert_boost + irri_boost) + noise)
+
+        data.append([
+            crop, n, p, k, round(ph, 1), round(moisture, 1), soil,
+            round(temp, 1), round(rainfall, 1), round(humidity, 1), round(sunlight, 1),
+            fertilizer, round(dosage, 1), irrigation, growth_days, season, area, round(yield_per_ha, 3)
+        ])
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def compare_distributions(a, b):
+    """Standardized mean gap and std ratio per numeric column, TV distance per categorical."""
+    report = {}
+    for column in COLUMNS:
+        if not pd.api.types.is_numeric_dtype(a[column]):
+            fa = a[column].value_counts(normalize=True)
+            fb = b[column].value_counts(normalize=True)
+            report[column] = {'tv_distance': float(0.5 * fa.sub(fb, fill_value=0).abs().sum())}
+        else:
+            std = a[column].std() or 1.0
+            report[column] = {
+                'mean_gap_in_std': float(abs(a[column].mean() - b[column].mean()) / std),
+                'std_ratio': float(b[column].std() / std)
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    legacy, legacy_s = timed(lambda: legacy_rows(args.rows))
+    vectorized, vectorized_s = timed(lambda: generate_chunk(np.random.default_rng(args.seed), args.rows))
+
+    print(f"rows: {args.rows}")
+    print(f"legacy loop : {args.rows / legacy_s:>14,.0f} rows/s ({legacy_s:.2f}s)")
+    print(f"vectorized  : {args.rows / vectorized_s:>14,.0f} rows/s ({vectorized_s:.2f}s)")
+    print(f"speedup     : {legacy_s / vectorized_s:.1f}x")
+    print("\ndistribution check (legacy vs vectorized):")
+    for column, stats in compare_distributions(legacy, vectorized).items():
+        print(f"  {column:<18} " + ", ".join(f"{k}={v:.3f}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""In-process latency of the Flask handlers through the test client (no network, no gunicorn).
+
+Run from backend/:  python -m benchmarks.bench_handler [--output FILE]
+
+Covers the full handler path (parse, validation, model call, JSON) for
+/predict with distinct records and /predict/batch at a few batch sizes.
+The prediction cache is off so every /predict call reaches the model.
+"""
+import argparse
+import os
+
+from benchmarks.common import as_payloads, print_results, sample_records, summarize, time_calls, write_results
+
+BATCH_SIZES = [100, 1000]
+
+
+def run(n_records=2000, batch_sizes=BATCH_SIZES, min_seconds=1.0, seed=42):
+    # Read once at import by app.py
+    os.environ['PREDICTION_CACHE'] = 'off'
+    os.environ.setdefault('LOG_SAMPLE_RATE', '0')
+    os.environ.setdefault('MODEL_RELOAD_INTERVAL', '0')
+    import app
+
+    client = app.app.test_client()
+    payloads = as_payloads(sample_records(max([n_records] + batch_sizes), seed=seed))
+    results = []
+
+    position = [0]
+
+    def predict_one():
+        record = payloads[position[0] % n_records]
+        position[0] += 1
+        response = client.post('/predict', json=record)
+        assert response.status_code == 200, response.get_json()
+
+    timings = time_calls(predict_one, min_repeats=200, min_seconds=min_seconds)
+    metrics = summarize(timings)
+    metrics['requests_per_s'] = len(timings) / sum(timings)
+    results.append({'benchmark': 'handler', 'case': 'predict', 'metrics': metrics})
+
+    for size in batch_sizes:
+        body = {'records': payloads[:size]}
+
+        def predict_batch():
+            response = client.post('/predict/batch', json=body)
+            assert response.status_code == 200, response.get_json()
+
+        timings = time_calls(predict_batch, min_repeats=5, min_seconds=min_seconds)
+        metrics = summarize(timings)
+        metrics['rows_per_s'] = size / (metrics['p50_ms'] / 1e3)
+        results.append({'benchmark': 'handler', 'case': f'predict_batch/records={size}', 'metrics': metrics})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=BATCH_SIZES)
+    parser.add_argument('--min-seconds', type=float, default=1.0, help="Minimum timing per case")
+    parser.add_argument('--output', default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(batch_sizes=args.batch_sizes, min_seconds=args.min_seconds)
+    print_results(results)
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Closed-loop load test of the API under gunicorn across worker / thread counts.
+
+Run from backend/:  python -m benchmarks.bench_load [--mode wsgi|asgi] [--grid 1x1 2x4] [--clients 512]
+
+For each WORKERSxTHREADS setting a real gunicorn is started and C clients
+each send /predict requests back to back (a new request as soon as the
+previous answer arrives) for the given duration. Throughput and latency
+percentiles are reported per setting. --mode wsgi serves app:app on
+sync/gthread workers (THREADS = --threads); --mode asgi serves asgi_app:app
+on uvicorn workers (THREADS = ASGI_MODEL_THREADS). Clients are asyncio
+connections in this process, so hundreds of them are cheap, but they run on
+the same machine as the server and compete with it for CPU.
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlparse
+
+from benchmarks.common import (as_payloads, gunicorn_server, print_results, sample_records,
+                               summarize, write_results)
+
+GRID = ['1x1', '2x1', '2x4']
+
+
+async def _send(reader, writer, host, body):
+    writer.write(b'POST /predict HTTP/1.1\r\nHost: ' + host + b'\r\nContent-Type: application/json\r\n'
+                 b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict(line.lower().split(': ', 1) for line in lines[1:] if ': ' in line)
+    await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection') == 'close'
+
+
+async def client_loop(url, bodies, offset, stop_at, latencies, errors):
+    host = f'{url.hostname}:{url.port}'.encode()
+    reader = writer = None
+    i = offset
+    while time.perf_counter() < stop_at:
+        body = bodies[i % len(bodies)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(url.hostname, url.port)
+            status, close = await asyncio.wait_for(_send(reader, writer, host, body), timeout=60)
+            if close:
+                # Sync workers close after every response; reconnect for the next one
+                writer.close()
+                reader = writer = None
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            status = None
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(status)
+    if writer is not None:
+        writer.close()
+
+
+async def drive(base_url, bodies, clients, seconds):
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + seconds
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop(urlparse(base_url), bodies, c * 997, stop_at, latencies, errors)
+                           for c in range(clients)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_setting(mode, workers, threads, clients, duration, bodies, warmup=2.0):
+    env = {'PREDICTION_CACHE': 'off', 'LOG_SAMPLE_RATE': '0', 'MODEL_RELOAD_INTERVAL': '0'}
+    args = ['-w', str(workers), '--backlog', '4096']
+    if mode == 'asgi':
+        args += ['-k', 'uvicorn_worker.UvicornWorker']
+        env['ASGI_MODEL_THREADS'] = str(threads)
+        app = 'asgi_app:app'
+    else:
+        args += ['--threads', str(threads)]
+        app = 'app:app'
+    with gunicorn_server(args, env=env, app=app) as (base_url, _):
+        asyncio.run(drive(base_url, bodies, clients, warmup))
+        latencies, errors, elapsed = asyncio.run(drive(base_url, bodies, clients, duration))
+
+    metrics = summarize(latencies) if latencies else {}
+    metrics.update({'requests_per_s': len(latencies) / elapsed, 'requests': len(latencies),
+                    'errors': len(errors), 'clients': clients})
+    return {'benchmark': 'load', 'case': f'{mode}/workers={workers}/threads={threads}/clients={clients}',
+            'metrics': metrics}
+
+
+def run(grid=GRID, duration=10.0, clients=None, mode='wsgi', seed=42):
+    bodies = [json.dumps(p).encode() for p in as_payloads(sample_records(5000, seed=seed))]
+    results = []
+    for setting in grid:
+        workers, threads = (int(x) for x in setting.split('x'))
+        n_clients = clients or 2 * workers * threads
+        results.append(run_setting(mode, workers, threads, n_clients, duration, bodies))
+        print_results(results[-1:])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--grid', nargs='+', default=GRID, help="WORKERSxTHREADS settings to run")
+    parser.add_argument('--duration', type=float, default=10.0, help="Measured seconds per setting")
+    parser.add_argument('--clients', type=int, default=None,
+                        help="Concurrent closed-loop clients (default: 2 x workers x threads)")
+    parser.add_argument('--output', default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.grid, args.duration, args.clients, args.mode)
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
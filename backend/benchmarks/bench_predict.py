@@ -0,0 +1,66 @@
+"""Model predict latency and throughput at batch sizes 1 .. 100k.
+
+Run from backend/:  python -m benchmarks.bench_predict [--batch-sizes 1 100 ...] [--output FILE]
+
+Times the sklearn Pipeline from the .pkl, its compiled form (FAST_INFERENCE),
+the registry bundle the API serves by default and the NumPy-only edge model
+(skipped if it has not been exported), on the same data_engine sample, so the
+cost of the model call can be separated from the HTTP layer.
+"""
+import argparse
+import warnings
+
+from benchmarks.common import print_results, sample_records, summarize, time_calls, write_results
+from model_bundle import load_serving_model
+from model_registry import resolve
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000, 100000]
+
+MODELS = {
+    'pipeline': {'model_format': 'pickle', 'fast_inference': False},
+    'compiled': {'model_format': 'pickle', 'fast_inference': True},
+    'bundle': {'model_format': 'bundle', 'fast_inference': True},
+    'edge': {'model_format': 'edge', 'fast_inference': True}
+}
+
+
+def run(batch_sizes=BATCH_SIZES, models=tuple(MODELS), registry='models/crop_yield_xgb',
+        pickle_path='models/crop_yield_xgb.pkl', edge_path='models/crop_yield_edge.npz', min_seconds=0.5, seed=42):
+    frame = sample_records(max(batch_sizes), seed=seed)
+    results = []
+    for name in models:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # sklearn version warnings when unpickling
+            model = load_serving_model(resolve(registry), pickle_path, edge_path=edge_path, **MODELS[name])
+        if model is None:
+            continue
+        for size in batch_sizes:
+            batch = frame.head(size)
+            if size == 1:
+                record = batch.to_dict('records')[0]
+                timings = time_calls(lambda: model.predict_row(record), min_seconds=min_seconds)
+            else:
+                timings = time_calls(lambda: model.predict(batch), min_seconds=min_seconds)
+            metrics = summarize(timings)
+            metrics['rows_per_s'] = size / (metrics['p50_ms'] / 1e3)
+            metrics['repeats'] = len(timings)
+            results.append({'benchmark': 'predict', 'case': f'{name}/batch={size}', 'metrics': metrics})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=BATCH_SIZES)
+    parser.add_argument('--models', nargs='+', default=list(MODELS), choices=list(MODELS))
+    parser.add_argument('--min-seconds', type=float, default=0.5, help="Minimum timing per case")
+    parser.add_argument('--output', default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.batch_sizes, args.models, min_seconds=args.min_seconds)
+    print_results(results)
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
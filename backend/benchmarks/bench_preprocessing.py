@@ -0,0 +1,101 @@
+"""Fit time, predict time and peak RSS of the tree-optimized feature pipeline vs the original one.
+
+Run from backend/:  python -m benchmarks.bench_preprocessing [--rows N]
+
+Each variant runs in a fresh process so its peak RSS is not polluted by the
+other. Data comes from data_engine.generate_shard, so nothing is read from disk.
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+
+import numpy as np
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from xgboost import XGBRegressor
+
+from data_engine import generate_shard
+from data_loader import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, TARGET, DTYPES
+from preprocessing import build_preprocessor, xgb_feature_types
+
+NUMERICAL = [name for name in NUMERICAL_FEATURES if name != 'Area']
+
+VARIANTS = {
+    # The layout train_pipeline.py used before: scaled float64 numerics + one-hot
+    'scaled_onehot': {'encoding': 'scaled_onehot', 'xgb': {}},
+    'ordinal_native': {'encoding': 'ordinal', 'xgb': {
+        'enable_categorical': True,
+        'feature_types': xgb_feature_types(build_preprocessor(NUMERICAL, CATEGORICAL_FEATURES))}}
+}
+
+
+def run_variant(name, rows, seed, queue):
+    variant = VARIANTS[name]
+    df = generate_shard(np.random.SeedSequence(seed), rows)
+    df = df.astype({k: v for k, v in DTYPES.items() if k in df.columns})
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[NUMERICAL + CATEGORICAL_FEATURES], df[TARGET], test_size=0.2, random_state=42)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    model = Pipeline(steps=[
+        ('preprocessor', build_preprocessor(NUMERICAL, CATEGORICAL_FEATURES, encoding=variant['encoding'])),
+        ('model', XGBRegressor(n_estimators=100, learning_rate=0.1, max_depth=6, tree_method='hist',
+                               n_jobs=-1, random_state=42, **variant['xgb']))
+    ])
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_s = time.perf_counter() - start
+
+    one_row = X_test.head(1)
+    start = time.perf_counter()
+    for _ in range(100):
+        model.predict(one_row)
+    single_ms = (time.perf_counter() - start) * 10
+
+    encoded = model.named_steps['preprocessor'].transform(X_test)
+    queue.put({
+        'variant': name,
+        'fit_s': fit_s,
+        'predict_s': predict_s,
+        'predict_1row_ms': single_ms,
+        'encoded_shape': encoded.shape,
+        'encoded_dtype': str(encoded.dtype),
+        'encoded_mb': encoded.data.nbytes / 1024 ** 2 if hasattr(encoded, 'tocsr') else encoded.nbytes / 1024 ** 2,
+        'r2': r2_score(y_test, y_pred),
+        'rss_before_fit_mb': rss_before,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    results = []
+    for name in VARIANTS:
+        process = ctx.Process(target=run_variant, args=(name, args.rows, args.seed, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print(f"rows: {args.rows}")
+    header = f"{'variant':<16}{'fit s':>8}{'predict s':>11}{'1-row ms':>10}{'encoded':>20}{'enc MB':>9}{'peak RSS MB':>13}{'R2':>8}"
+    print(header)
+    for r in results:
+        shape = f"{r['encoded_shape'][1]} cols {r['encoded_dtype']}"
+        print(f"{r['variant']:<16}{r['fit_s']:>8.2f}{r['predict_s']:>11.3f}{r['predict_1row_ms']:>10.2f}"
+              f"{shape:>20}{r['encoded_mb']:>9.1f}{r['peak_rss_mb']:>13.0f}{r['r2']:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
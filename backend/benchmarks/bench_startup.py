@@ -0,0 +1,121 @@
+"""Gunicorn boot time and per-worker memory: pickled Pipeline vs model bundle, with and without preload_app.
+
+Run from backend/:  python -m benchmarks.bench_startup [--workers 4]
+
+Each configuration starts a real gunicorn on a free port and reports the
+time until the first /predict answers, then sends a few requests so every
+worker has scored, and reads RSS and PSS (RSS with shared pages split
+between the processes sharing them) from /proc. Linux only.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+CONFIGS = {
+    'pickle': {'MODEL_FORMAT': 'pickle', 'GUNICORN_PRELOAD': '0'},
+    'pickle+preload': {'MODEL_FORMAT': 'pickle', 'GUNICORN_PRELOAD': '1'},
+    'bundle': {'MODEL_FORMAT': 'bundle', 'GUNICORN_PRELOAD': '0'},
+    'bundle+lazy': {'MODEL_FORMAT': 'bundle', 'GUNICORN_PRELOAD': '0', 'LAZY_MODEL_LOAD': '1'},
+    'bundle+preload': {'MODEL_FORMAT': 'bundle', 'GUNICORN_PRELOAD': '1'}
+}
+
+RECORD = {'Crop_Type': 'Rice', 'Soil_Type': 'Loam', 'Irrigation_Method': 'Drip', 'Season': 'Kharif',
+          'Nitrogen': 80, 'Rainfall': 150, 'Area': 2}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def post(url, payload, timeout=30):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.status
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def memory_mb(pid):
+    """(RSS, PSS) of one process in MB from /proc/<pid>/smaps_rollup."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0]] = int(parts[1]) / 1024
+    return values['Rss:'], values['Pss:']
+
+
+def run_config(name, workers, requests_per_worker):
+    port = free_port()
+    env = dict(os.environ, PYTHONWARNINGS='ignore', PREDICTION_CACHE='off', **CONFIGS[name])
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}', 'app:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        url = f'http://127.0.0.1:{port}/predict'
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with code {server.returncode}")
+            try:
+                post(url, RECORD, timeout=60)
+                break
+            except OSError:
+                time.sleep(0.02)
+        first_predict_s = time.perf_counter() - start
+
+        # Wait for every worker to be forked, then touch them all
+        while len(children(server.pid)) < workers:
+            time.sleep(0.05)
+        for _ in range(workers * requests_per_worker):
+            post(url, RECORD)
+        all_ready_s = time.perf_counter() - start
+
+        worker_memory = [memory_mb(pid) for pid in children(server.pid)]
+        master_rss, master_pss = memory_mb(server.pid)
+        return {
+            'config': name,
+            'first_predict_s': first_predict_s,
+            'all_workers_s': all_ready_s,
+            'worker_rss_mb': sum(rss for rss, _ in worker_memory) / len(worker_memory),
+            'worker_pss_mb': sum(pss for _, pss in worker_memory) / len(worker_memory),
+            'total_pss_mb': master_pss + sum(pss for _, pss in worker_memory),
+            'master_rss_mb': master_rss
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests-per-worker', type=int, default=10)
+    parser.add_argument('--configs', nargs='+', default=list(CONFIGS), choices=list(CONFIGS))
+    args = parser.parse_args()
+
+    results = [run_config(name, args.workers, args.requests_per_worker) for name in args.configs]
+
+    print(f"workers: {args.workers}")
+    print(f"{'config':<16}{'1st predict s':>14}{'all warm s':>12}{'worker RSS MB':>15}"
+          f"{'worker PSS MB':>15}{'total PSS MB':>14}")
+    for r in results:
+        print(f"{r['config']:<16}{r['first_predict_s']:>14.2f}{r['all_workers_s']:>12.2f}"
+              f"{r['worker_rss_mb']:>15.0f}{r['worker_pss_mb']:>15.0f}{r['total_pss_mb']:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
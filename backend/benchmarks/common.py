@@ -0,0 +1,118 @@
+"""Shared helpers for the prediction-service benchmarks: inputs, timing, servers and JSON results."""
+import json
+import os
+import platform
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+
+import numpy as np
+
+from data_engine import generate_shard
+from data_loader import CATEGORICAL_FEATURES, NUMERICAL_FEATURES
+from schema import valid_rows
+
+
+def sample_records(n, seed=42):
+    """n valid request records drawn from data_engine, as a DataFrame with the API's input fields."""
+    # data_engine occasionally draws values the schema rejects (e.g. negative moisture)
+    df = generate_shard(np.random.SeedSequence(seed), n + n // 10 + 10)
+    df = df[valid_rows(df)].head(n)
+    return df[CATEGORICAL_FEATURES + NUMERICAL_FEATURES].reset_index(drop=True)
+
+
+def as_payloads(frame):
+    """DataFrame -> list of JSON-safe dicts (numpy scalars converted)."""
+    return json.loads(frame.to_json(orient='records'))
+
+
+def summarize(latencies_s):
+    """Latency percentiles in milliseconds for a list of durations in seconds."""
+    p50, p95, p99 = np.percentile(latencies_s, [50, 95, 99]) * 1e3
+    return {'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99),
+            'mean_ms': float(np.mean(latencies_s) * 1e3)}
+
+
+def time_calls(fn, min_repeats=5, min_seconds=0.5, max_repeats=10000):
+    """Call fn until both min_repeats and min_seconds are reached; returns each call's duration."""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_repeats and (len(timings) < min_repeats
+                                          or time.perf_counter() - started < min_seconds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def gunicorn_server(args=(), env=None, ready_path='/health', timeout=120, app='app:app'):
+    """Start gunicorn on `app` on a free port from backend/; yields (base_url, process)."""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', *args, '-b', f'127.0.0.1:{port}', app],
+        env=dict(os.environ, PYTHONWARNINGS='ignore', **(env or {})),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with code {server.returncode}")
+            if time.monotonic() > deadline:
+                raise RuntimeError("gunicorn did not become ready")
+            try:
+                urllib.request.urlopen(base_url + ready_path, timeout=5).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        yield base_url, server
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def environment():
+    """Where a result came from, so runs on different commits / machines can be told apart."""
+    import xgboost
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'xgboost': xgboost.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def write_results(path, results):
+    """Write benchmark results ([{'benchmark', 'case', 'metrics'}]) with environment info as JSON."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {path}")
+
+
+def print_results(results):
+    for r in results:
+        metrics = '  '.join(f"{k} {v:,.3f}" if isinstance(v, float) else f"{k} {v}" for k, v in r['metrics'].items())
+        print(f"{r['benchmark']:<8} {r['case']:<28} {metrics}")
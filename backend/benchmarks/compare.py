@@ -0,0 +1,66 @@
+"""Compare two benchmark result files and fail on regressions.
+
+Run from backend/:  python -m benchmarks.compare BASELINE.json CURRENT.json [--threshold 0.15]
+
+Cases are matched by (benchmark, case). Throughput metrics (*_per_s) regress
+when they drop, latency metrics (*_ms) when they rise, by more than the
+threshold fraction. Exits with status 1 if any checked metric regressed.
+"""
+import argparse
+import json
+import sys
+
+# p95/p99 are reported but too noisy on short runs to gate on
+CHECKED_METRICS = ['p50_ms', 'rows_per_s', 'requests_per_s']
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_s')
+
+
+def compare(baseline, current, threshold=0.15, metrics=CHECKED_METRICS):
+    """Return one row per compared metric: (benchmark, case, metric, old, new, change, regressed)."""
+    old = {(r['benchmark'], r['case']): r['metrics'] for r in baseline['results']}
+    rows = []
+    for r in current['results']:
+        before = old.get((r['benchmark'], r['case']))
+        if before is None:
+            continue
+        for metric in metrics:
+            if metric not in before or metric not in r['metrics'] or not before[metric]:
+                continue
+            change = (r['metrics'][metric] - before[metric]) / before[metric]
+            worse = -change if higher_is_better(metric) else change
+            rows.append((r['benchmark'], r['case'], metric, before[metric], r['metrics'][metric],
+                         change, worse > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Allowed relative slowdown before a metric counts as regressed")
+    parser.add_argument('--metrics', nargs='+', default=CHECKED_METRICS)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    print(f"baseline {baseline['environment'].get('commit')}  ->  current {current['environment'].get('commit')}"
+          f"  (threshold {args.threshold:.0%})")
+    rows = compare(baseline, current, args.threshold, args.metrics)
+    for benchmark, case, metric, before, after, change, regressed in rows:
+        flag = 'REGRESSED' if regressed else ''
+        print(f"{benchmark:<8} {case:<28} {metric:<15} {before:>12,.3f} {after:>12,.3f} {change:>+8.1%}  {flag}")
+
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"{len(rows)} metrics compared, {regressions} regressed")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
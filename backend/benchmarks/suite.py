@@ -0,0 +1,48 @@
+"""Run the prediction-service benchmarks and save the results as one JSON file.
+
+Run from backend/:  python -m benchmarks.suite [--quick] [--output FILE] [--baseline FILE]
+
+Runs bench_predict, bench_handler and bench_load. Results go to
+benchmarks/results/<commit>.json by default. With --baseline they are
+then checked against an earlier run (see benchmarks.compare), and the
+exit status is 1 on regression, so the suite can gate CI.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from benchmarks import bench_handler, bench_load, bench_predict
+from benchmarks.common import environment, print_results, write_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help="Fewer cases and shorter runs, for a smoke check")
+    parser.add_argument('--skip', nargs='+', default=[], choices=['predict', 'handler', 'load'])
+    parser.add_argument('--output', default=None, help="Result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--baseline', default=None, help="Earlier result file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.15, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    results = []
+    if 'predict' not in args.skip:
+        sizes = [1, 100, 10000] if args.quick else bench_predict.BATCH_SIZES
+        results += bench_predict.run(sizes, min_seconds=0.2 if args.quick else 0.5)
+    if 'handler' not in args.skip:
+        results += bench_handler.run(min_seconds=0.3 if args.quick else 1.0)
+    if 'load' not in args.skip:
+        results += bench_load.run(['1x1', '2x4'] if args.quick else bench_load.GRID,
+                                  duration=3.0 if args.quick else 10.0)
+    print_results(results)
+
+    output = args.output or os.path.join('benchmarks', 'results', f"{environment()['commit'] or 'local'}.json")
+    write_results(output, results)
+
+    if args.baseline:
+        sys.exit(subprocess.call([sys.executable, '-m', 'benchmarks.compare', args.baseline, output,
+                                  '--threshold', str(args.threshold)]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 import numpy as np
 import pandas as pd
-import random
 
 # Configuration
 NUM_SAMPLES = 20000
@@ -38,74 +42,190 @@ CROP_BASE_YIELD = {
     'Jute': (2.5, 0.3), 'Potato': (20.0, 3.0), 'Onion': (15.0, 2.0)
 }
 
-def generate_dataset():
-    data = []
-    
-    for _ in range(NUM_SAMPLES):
-        # 1. Select a Crop
-        crop = random.choice(CROPS)
-        base_yield_mean, base_yield_std = CROP_BASE_YIELD[crop]
-        
-        # 2. Select a Farming Cluster (Scenario)
-        cluster_name = random.choices(list(CLUSTERS.keys()), weights=[0.4, 0.3, 0.2, 0.1])[0]
-        cluster = CLUSTERS[cluster_name]
-        
-        # 3. Sample independant variables from Cluster distributions
-        n = max(0, np.random.normal(cluster['N'][0], cluster['N'][1]))
-        p = max(0, np.random.normal(cluster['P'][0], cluster['P'][1]))
-        k = max(0, np.random.normal(cluster['K'][0], cluster['K'][1]))
-        fert_dosage = max(0, np.random.normal(cluster['Fertilizer_Dosage'][0], cluster['Fertilizer_Dosage'][1]))
-        
-        # 4. Sample Weather (Correlated with Cluster somewhat - e.g. Drought has high temp)
-        if cluster_name == 'Stress_Drought':
-            temp = np.random.normal(35, 5) # Hot
-            rain = max(0, np.random.normal(50, 30)) # Dry
-            moisture = np.random.normal(30, 10) # Dry soil
+CLUSTER_NAMES = list(CLUSTERS)
+CLUSTER_WEIGHTS = [0.4, 0.3, 0.2, 0.1]
+IRRIGATION_METHODS = ['Drip', 'Sprinkler', 'Flood', 'Rainfed']
+SOIL_TYPES = ['Clay', 'Sandy', 'Loam', 'Silt']
+
+SEED = 42
+SHARD_SIZE = 100_000
+PARTITION_COLS = ['Crop_Type', 'Season']
+
+
+def _cluster_table(key):
+    return np.array([CLUSTERS[name][key] for name in CLUSTER_NAMES], dtype=np.float64)
+
+
+# Lookup tables indexed by cluster / crop id: column 0 is the mean, column 1 the std
+N_TABLE = _cluster_table('N')
+P_TABLE = _cluster_table('P')
+K_TABLE = _cluster_table('K')
+DOSAGE_TABLE = _cluster_table('Fertilizer_Dosage')
+YIELD_FACTOR_TABLE = _cluster_table('Yield_Factor')
+BASE_YIELD_TABLE = np.array([CROP_BASE_YIELD[crop] for crop in CROPS], dtype=np.float64)
+# Cumulative irrigation probabilities per cluster, for inverse-CDF sampling
+IRRIGATION_CDF = np.cumsum([[CLUSTERS[name]['Irrigation_Prob'][m] for m in IRRIGATION_METHODS]
+                            for name in CLUSTER_NAMES], axis=1)
+
+
+def _sample(rng, table, idx):
+    return rng.normal(table[idx, 0], table[idx, 1])
+
+
+def generate_shard(seed_seq, size):
+    """Generate one shard of `size` samples from its own SeedSequence.
+
+    Every shard draws from an independent stream, so the output depends only
+    on the root seed and the shard layout, never on which process ran it.
+    """
+    rng = np.random.default_rng(seed_seq)
+
+    # 1-2. Crop and Farming Cluster (Scenario)
+    crop = rng.integers(0, len(CROPS), size)
+    cluster = rng.choice(len(CLUSTER_NAMES), size=size, p=CLUSTER_WEIGHTS)
+    drought = np.asarray(CLUSTER_NAMES)[cluster] == 'Stress_Drought'
+
+    # 3. Independent variables from Cluster distributions
+    n = np.maximum(0, _sample(rng, N_TABLE, cluster))
+    p = np.maximum(0, _sample(rng, P_TABLE, cluster))
+    k = np.maximum(0, _sample(rng, K_TABLE, cluster))
+    fert_dosage = np.maximum(0, _sample(rng, DOSAGE_TABLE, cluster))
+
+    # 4. Weather (Drought clusters are hot and dry)
+    temp = rng.normal(np.where(drought, 35, 25), 5)
+    rain = np.maximum(0, rng.normal(np.where(drought, 50, 150), np.where(drought, 30, 50)))
+    moisture = rng.normal(np.where(drought, 30, 60), np.where(drought, 10, 15))
+    ph = rng.normal(6.5, 0.5, size)
+    humidity = rng.normal(70, 10, size)
+    sunlight = rng.normal(8, 2, size)
+
+    # 5. Categorical
+    irrigation = (rng.random(size)[:, None] > IRRIGATION_CDF[cluster]).sum(axis=1)
+    irrigation = np.minimum(irrigation, len(IRRIGATION_METHODS) - 1)  # guard cumsum rounding
+    season = rng.integers(0, len(SEASONS), size)
+    soil_type = rng.integers(0, len(SOIL_TYPES), size)
+
+    # 6. Yield from Cluster factor + noise (no formula)
+    yield_factor = np.maximum(0.1, _sample(rng, YIELD_FACTOR_TABLE, cluster))
+    final_yield = np.maximum(0, _sample(rng, BASE_YIELD_TABLE, crop) * yield_factor)
+
+    area = np.round(rng.uniform(0.5, 10.0, size), 2)
+    growth_duration = np.trunc(rng.normal(120, 15, size)).astype(np.int64)
+
+    return pd.DataFrame({
+        'Crop_Type': np.asarray(CROPS)[crop],
+        'Nitrogen': np.round(n, 1), 'Phosphorus': np.round(p, 1), 'Potassium': np.round(k, 1),
+        'Soil_pH': np.round(ph, 1), 'Soil_Moisture': np.round(moisture, 1),
+        'Soil_Type': np.asarray(SOIL_TYPES)[soil_type],
+        'Temperature': np.round(temp, 1), 'Rainfall': np.round(rain, 1), 'Humidity': np.round(humidity, 1),
+        'Sunlight_Hours': np.round(sunlight, 1),
+        'Fertilizer_Type': 'Complex',  # Simplified
+        'Fertilizer_Dosage': np.round(fert_dosage, 1),
+        'Irrigation_Method': np.asarray(IRRIGATION_METHODS)[irrigation],
+        'Growth_Duration': growth_duration,
+        'Season': np.asarray(SEASONS)[season],
+        'Area': area,
+        'Yield_per_Hectare': np.round(final_yield, 3),
+        'Cluster_Label': np.asarray(CLUSTER_NAMES)[cluster]  # For debugging/EDA, not training
+    })
+
+
+def shard_plan(num_samples, seed, shard_size):
+    """[(shard_index, SeedSequence, size), ...] for a run; independent of worker count."""
+    sizes = [min(shard_size, num_samples - start) for start in range(0, num_samples, shard_size)]
+    children = np.random.SeedSequence(seed).spawn(len(sizes))
+    return list(zip(range(len(sizes)), children, sizes))
+
+
+def _clear_parquet_dataset(output_path):
+    # Shards of an earlier run (other seed, row count or shard size) would be read
+    # back as part of this one; remove every part file and the emptied partition folders
+    for root, _, files in os.walk(output_path, topdown=False):
+        for name in files:
+            if name.startswith('part-') and name.endswith('.parquet'):
+                os.remove(os.path.join(root, name))
+        if root != output_path and not os.listdir(root):
+            os.rmdir(root)
+
+
+def _write_parquet_shard(task, output_path):
+    shard_index, seed_seq, size = task
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(generate_shard(seed_seq, size), preserve_index=False)
+    pq.write_to_dataset(table, output_path, partition_cols=PARTITION_COLS,
+                        basename_template=f"part-{shard_index:05d}-{{i}}.parquet",
+                        existing_data_behavior='overwrite_or_ignore')
+    return size
+
+
+def _generate_shard_task(task):
+    _, seed_seq, size = task
+    return generate_shard(seed_seq, size)
+
+
+def generate_dataset(num_samples=NUM_SAMPLES, seed=SEED, shard_size=SHARD_SIZE, workers=1,
+                     output_format='csv', output_path='data/merged_agricultural_data.csv'):
+    """Generate the clustered dataset shard by shard.
+
+    csv: shards are appended in shard order by the parent process.
+    parquet: each worker writes its shard straight into a dataset
+    partitioned by Crop_Type/Season, so the parent never holds the data.
+    Part files already in the dataset directory are removed first.
+    """
+    plan = shard_plan(num_samples, seed, shard_size)
+    workers = max(1, min(workers, len(plan)))
+
+    if output_format == 'parquet':
+        _clear_parquet_dataset(output_path)
+        write = partial(_write_parquet_shard, output_path=output_path)
+        if workers == 1:
+            written = sum(map(write, plan))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                written = sum(pool.map(write, plan))
+    else:
+        written = 0
+
+        def append(df):
+            nonlocal written
+            df.to_csv(output_path, mode='w' if written == 0 else 'a', header=(written == 0), index=False)
+            written += len(df)
+
+        if workers == 1:
+            for task in plan:
+                append(_generate_shard_task(task))
         else:
-            temp = np.random.normal(25, 5)
-            rain = max(0, np.random.normal(150, 50))
-            moisture = np.random.normal(60, 15)
-            
-        ph = np.random.normal(6.5, 0.5)
-        humidity = np.random.normal(70, 10)
-        sunlight = np.random.normal(8, 2)
-        
-        # 5. Categorical
-        irrigation = random.choices(list(cluster['Irrigation_Prob'].keys()), 
-                                    weights=list(cluster['Irrigation_Prob'].values()))[0]
-        season = random.choice(SEASONS)
-        soil_type = random.choice(['Clay', 'Sandy', 'Loam', 'Silt'])
-        
-        # 6. Determine Yield (Using Cluster Factor + Noise - NO FORMULA)
-        # We use the cluster's "Yield Factor" distribution to determine outcome
-        # This simulates that "Commercial" farms yield high, "Drought" yields low
-        # The ML model will have to LEARN that High N + Temp + Rain = High Yield
-        # Without us writing `Yield = N * 0.5 + P * 0.2`
-        
-        yield_factor = max(0.1, np.random.normal(cluster['Yield_Factor'][0], cluster['Yield_Factor'][1]))
-        final_yield = max(0, np.random.normal(base_yield_mean, base_yield_std) * yield_factor)
-        
-        area = round(random.uniform(0.5, 10.0), 2)
-        
-        data.append({
-            'Crop_Type': crop,
-            'Nitrogen': round(n, 1), 'Phosphorus': round(p, 1), 'Potassium': round(k, 1),
-            'Soil_pH': round(ph, 1), 'Soil_Moisture': round(moisture, 1), 'Soil_Type': soil_type,
-            'Temperature': round(temp, 1), 'Rainfall': round(rain, 1), 'Humidity': round(humidity, 1),
-            'Sunlight_Hours': round(sunlight, 1),
-            'Fertilizer_Type': 'Complex', # Simplified
-            'Fertilizer_Dosage': round(fert_dosage, 1),
-            'Irrigation_Method': irrigation,
-            'Growth_Duration': int(np.random.normal(120, 15)),
-            'Season': season,
-            'Area': area,
-            'Yield_per_Hectare': round(final_yield, 3),
-            'Cluster_Label': cluster_name # For debugging/EDA, not training
-        })
-        
-    df = pd.DataFrame(data)
-    df.to_csv('data/merged_agricultural_data.csv', index=False)
-    print(f"Generated {NUM_SAMPLES} samples in data/merged_agricultural_data.csv")
+            # Writing a shard is slower than generating one: keep at most 2 x workers
+            # shards in flight so finished ones do not pile up in the parent, and
+            # append them in submission order so the file is identical for any worker count
+            pending = deque()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for task in plan:
+                    pending.append(pool.submit(_generate_shard_task, task))
+                    while len(pending) >= 2 * workers or (pending and pending[0].done()):
+                        append(pending.popleft().result())
+                while pending:
+                    append(pending.popleft().result())
+
+    print(f"Generated {written} samples in {output_path}")
+
 
 if __name__ == "__main__":
-    generate_dataset()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the cluster-based agricultural dataset")
+    parser.add_argument('--samples', type=int, default=NUM_SAMPLES)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--output', default=None,
+                        help="CSV file or Parquet dataset directory "
+                             "(default data/merged_agricultural_data.csv / data/merged_agricultural_data/)")
+    args = parser.parse_args()
+
+    output = args.output or ('data/merged_agricultural_data.csv' if args.format == 'csv'
+                             else 'data/merged_agricultural_data')
+    generate_dataset(args.samples, args.seed, args.shard_size, args.workers, args.format, output)
@@ -0,0 +1,118 @@
+import os
+import time
+
+import pandas as pd
+
+from schema import CATEGORICAL_FIELDS, NUMERIC_FIELDS
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Dataset schema, declared once for every training script.
+# Feature names and order come from schema.FIELDS, which the API validates against.
+# Categoricals load as pandas 'category', measurements as float32 and the
+# day count as int16, instead of object strings and float64/int64.
+CATEGORICAL_FEATURES = list(CATEGORICAL_FIELDS)
+NUMERICAL_FEATURES = list(NUMERIC_FIELDS)
+TARGET = 'Yield_per_Hectare'
+
+DTYPES = {name: 'category' for name in CATEGORICAL_FEATURES + ['Cluster_Label']}
+DTYPES.update({name: 'float32' for name in NUMERICAL_FEATURES + [TARGET]})
+DTYPES['Growth_Duration'] = 'int16'
+
+# 'None' is a real Fertilizer_Type, not a missing value
+NA_VALUES = ['', 'NA', 'NaN', 'nan', 'null']
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def load_dataset(path, columns=None, memory_map=False, verbose=True):
+    """Load a CSV, Parquet (file or partitioned directory) or Feather dataset with the shared schema.
+
+    columns: optional projection; only these columns are read from disk.
+    memory_map: memory-map Parquet/Feather files instead of reading them into buffers.
+    """
+    start = time.perf_counter()
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension in ('.parquet', '.pq') or os.path.isdir(path):
+        df = pd.read_parquet(path, columns=columns, memory_map=memory_map)
+    elif extension in ('.feather', '.arrow'):
+        from pyarrow import feather
+        df = feather.read_table(path, columns=columns, memory_map=memory_map).to_pandas()
+    else:
+        dtypes = {name: dtype for name, dtype in DTYPES.items() if columns is None or name in columns}
+        engine = 'pyarrow' if _has_pyarrow() else 'c'
+        df = pd.read_csv(path, usecols=columns, dtype=dtypes, engine=engine,
+                         keep_default_na=False, na_values=NA_VALUES)
+
+    # Columnar formats keep their own types; coerce anything that differs from the schema
+    casts = {name: dtype for name, dtype in DTYPES.items()
+             if name in df.columns and str(df[name].dtype) != dtype}
+    if casts:
+        df = df.astype(casts)
+
+    if verbose:
+        elapsed = time.perf_counter() - start
+        frame_mb = df.memory_usage(deep=True).sum() / 1024 ** 2
+        peak = _peak_rss_mb()
+        peak_text = f", peak RSS {peak:.0f} MB" if peak is not None else ""
+        print(f"Loaded {len(df):,} rows x {df.shape[1]} cols from {path} in {elapsed:.2f}s "
+              f"(frame {frame_mb:.1f} MB{peak_text})")
+    return df
+
+
+def _rebatch(record_batches, chunk_size):
+    # Partitioned datasets yield many small fragments; coalesce them into chunks
+    # of exactly chunk_size rows, carrying the remainder into the next one
+    import pyarrow as pa
+    pending, rows = [], 0
+    for batch in record_batches:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunk_size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_size).to_pandas()
+            rest = table.slice(chunk_size)
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+def iter_chunks(path, chunk_size=500_000, columns=None):
+    """Yield the dataset as DataFrames of at most chunk_size rows, typed with the shared schema.
+
+    Nothing beyond one chunk is held in memory, so this works for files larger than RAM.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension in ('.parquet', '.pq', '.feather', '.arrow') or os.path.isdir(path):
+        import pyarrow.dataset as ds
+        fmt = 'feather' if extension in ('.feather', '.arrow') else 'parquet'
+        dataset = ds.dataset(path, format=fmt, partitioning='hive' if os.path.isdir(path) else None)
+        batches = _rebatch(dataset.to_batches(columns=columns, batch_size=chunk_size), chunk_size)
+    else:
+        dtypes = {name: dtype for name, dtype in DTYPES.items() if columns is None or name in columns}
+        # The pyarrow CSV engine cannot stream, so chunked reads use the C engine
+        batches = pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunk_size,
+                              keep_default_na=False, na_values=NA_VALUES)
+
+    for chunk in batches:
+        casts = {name: dtype for name, dtype in DTYPES.items()
+                 if name in chunk.columns and str(chunk[name].dtype) != dtype}
+        yield chunk.astype(casts) if casts else chunk
@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-import random
 
 # Constants for data generation
 NUM_ROWS = 15000
@@ -32,91 +31,116 @@ SEASONS = ['Kharif', 'Rabi', 'Zaid', 'Whole Year']
 IRRIGATION_METHODS = ['Drip', 'Sprinkler', 'Flood', 'Rainfed']
 FERTILIZER_TYPES = ['Urea', 'DAP', 'MOP', 'NPK', 'Superphosphate', 'Organic', 'None']
 
-def generate_data():
-    data = []
-    
-    for _ in range(NUM_ROWS):
-        crop = random.choice(CROPS)
-        profile = CROP_PROFILE[crop]
-        
-        # Add random variation to ideal conditions
-        n = max(0, int(np.random.normal(profile['N'], 20)))
-        p = max(0, int(np.random.normal(profile['P'], 15)))
-        k = max(0, int(np.random.normal(profile['K'], 15)))
-        ph = max(4.0, min(10.0, np.random.normal(profile['pH'], 0.5)))
-        moisture = max(20, min(100, np.random.normal(profile['Moisture'], 10)))
-        temp = max(10, min(45, np.random.normal(profile['Temp'], 5)))
-        rainfall = max(0, np.random.normal(profile['Rainfall'], 50))
-        humidity = max(20, min(100, np.random.normal(profile['Humidity'], 10)))
-        sunlight = max(2, min(14, np.random.normal(8, 2)))
-        
-        soil = random.choice(SOIL_TYPES)
-        season = random.choice(SEASONS)
-        irrigation = random.choice(IRRIGATION_METHODS)
-        fertilizer = random.choice(FERTILIZER_TYPES)
-        dosage = max(0, np.random.normal(100, 30)) if fertilizer != 'None' else 0
-        
-        area = round(random.uniform(0.5, 20.0), 2) # In Hectares internally
-        growth_days = int(np.random.normal(120, 20)) # Varies by crop reality but simplifying for random gen
-        
-        # Calculate Base Yield (tons/ha) - Simplified agronomic logic
-        base_yield = 5.0 # baseline
-        
-        # Nutrient Impact
-        # Optimal NPK boosts yield, deficiency hurts it
-        nutrient_score = 1.0
-        if n < profile['N'] * 0.7: nutrient_score -= 0.1
-        if p < profile['P'] * 0.7: nutrient_score -= 0.05
-        if k < profile['K'] * 0.7: nutrient_score -= 0.05
-        
-        # Weather Impact
-        weather_score = 1.0
-        if abs(temp - profile['Temp']) > 5: weather_score -= 0.2
-        if moisture < profile['Moisture'] * 0.6: weather_score -= 0.2
-        if rainfall < profile['Rainfall'] * 0.5 and irrigation == 'Rainfed': weather_score -= 0.4
-        
-        # Fertilizer Impact
-        fert_boost = 0
-        if fertilizer != 'None':
-            # Diminishing returns curve logic (simplified)
-            fert_boost = min(0.3, (dosage / 200.0) * 0.3) 
-            
-        # Irrigation Impact
-        irri_boost = 0.0
-        if irrigation in ['Drip', 'Sprinkler']:
-            irri_boost = 0.2
-        elif irrigation == 'Flood':
-            irri_boost = 0.1
-            
-        # Random noise
-        noise = np.random.normal(0, 0.5)
-        
-        # Final Yield Calculation
-        # Crop specific potential (arbitrary scalar for realism)
-        crop_potential = {
-             'Rice': 4.0, 'Wheat': 3.5, 'Maize': 5.0, 'Cotton': 2.0, 
-             'Sugarcane': 80.0, 'Tea': 2.0, 'Coffee': 1.5, 
-             'Jute': 2.5, 'Potato': 20.0, 'Onion': 15.0
-        }
-        
-        yield_per_ha = crop_potential[crop] * nutrient_score * weather_score * (1 + fert_boost + irri_boost) + noise
-        yield_per_ha = max(0.1, yield_per_ha) # Ensure positive
-        
-        data.append([
-            crop, n, p, k, round(ph, 1), round(moisture, 1), soil, 
-            round(temp, 1), round(rainfall, 1), round(humidity, 1), round(sunlight, 1),
-            fertilizer, round(dosage, 1), irrigation, growth_days, season, area, round(yield_per_ha, 3)
-        ])
-
-    columns = [
-        'Crop_Type', 'Nitrogen', 'Phosphorus', 'Potassium', 'Soil_pH', 'Soil_Moisture', 'Soil_Type', 
-        'Temperature', 'Rainfall', 'Humidity', 'Sunlight_Hours', 'Fertilizer_Type', 'Fertilizer_Dosage', 
-        'Irrigation_Method', 'Growth_Duration', 'Season', 'Area', 'Yield_per_Hectare'
-    ]
-    
-    df = pd.DataFrame(data, columns=columns)
-    df.to_csv('data/crop_yield_dataset.csv', index=False)
-    print(f"Dataset generated with {NUM_ROWS} rows at data/crop_yield_dataset.csv")
+# Crop specific potential yield in tons/ha (arbitrary scalar for realism)
+CROP_POTENTIAL = {
+    'Rice': 4.0, 'Wheat': 3.5, 'Maize': 5.0, 'Cotton': 2.0,
+    'Sugarcane': 80.0, 'Tea': 2.0, 'Coffee': 1.5,
+    'Jute': 2.5, 'Potato': 20.0, 'Onion': 15.0
+}
+
+COLUMNS = [
+    'Crop_Type', 'Nitrogen', 'Phosphorus', 'Potassium', 'Soil_pH', 'Soil_Moisture', 'Soil_Type',
+    'Temperature', 'Rainfall', 'Humidity', 'Sunlight_Hours', 'Fertilizer_Type', 'Fertilizer_Dosage',
+    'Irrigation_Method', 'Growth_Duration', 'Season', 'Area', 'Yield_per_Hectare'
+]
+
+SEED = 42
+CHUNK_SIZE = 1_000_000
+
+# Per-crop profile values as arrays, so a whole column can be looked up with one index array
+PROFILE_TABLE = {key: np.array([CROP_PROFILE[crop][key] for crop in CROPS], dtype=np.float64)
+                 for key in CROP_PROFILE[CROPS[0]]}
+POTENTIAL_TABLE = np.array([CROP_POTENTIAL[crop] for crop in CROPS])
+
+
+def generate_chunk(rng, size):
+    """Generate `size` rows as a DataFrame, sampling every column at once."""
+    crop_idx = rng.integers(0, len(CROPS), size)
+    profile = {key: values[crop_idx] for key, values in PROFILE_TABLE.items()}
+
+    # Add random variation to ideal conditions (int() truncates toward zero, as np.trunc)
+    n = np.maximum(0, np.trunc(rng.normal(profile['N'], 20))).astype(np.int64)
+    p = np.maximum(0, np.trunc(rng.normal(profile['P'], 15))).astype(np.int64)
+    k = np.maximum(0, np.trunc(rng.normal(profile['K'], 15))).astype(np.int64)
+    ph = np.clip(rng.normal(profile['pH'], 0.5), 4.0, 10.0)
+    moisture = np.clip(rng.normal(profile['Moisture'], 10), 20, 100)
+    temp = np.clip(rng.normal(profile['Temp'], 5), 10, 45)
+    rainfall = np.maximum(0, rng.normal(profile['Rainfall'], 50))
+    humidity = np.clip(rng.normal(profile['Humidity'], 10), 20, 100)
+    sunlight = np.clip(rng.normal(8, 2, size), 2, 14)
+
+    soil_idx = rng.integers(0, len(SOIL_TYPES), size)
+    season_idx = rng.integers(0, len(SEASONS), size)
+    irrigation_idx = rng.integers(0, len(IRRIGATION_METHODS), size)
+    fertilizer_idx = rng.integers(0, len(FERTILIZER_TYPES), size)
+    has_fertilizer = np.asarray(FERTILIZER_TYPES)[fertilizer_idx] != 'None'
+    dosage = np.where(has_fertilizer, np.maximum(0, rng.normal(100, 30, size)), 0.0)
+
+    area = np.round(rng.uniform(0.5, 20.0, size), 2)  # In Hectares internally
+    growth_days = np.trunc(rng.normal(120, 20, size)).astype(np.int64)
+
+    # Nutrient Impact: optimal NPK boosts yield, deficiency hurts it
+    nutrient_score = (1.0
+                      - np.where(n < profile['N'] * 0.7, 0.1, 0.0)
+                      - np.where(p < profile['P'] * 0.7, 0.05, 0.0)
+                      - np.where(k < profile['K'] * 0.7, 0.05, 0.0))
+
+    # Weather Impact
+    irrigation = np.asarray(IRRIGATION_METHODS)[irrigation_idx]
+    weather_score = (1.0
+                     - np.where(np.abs(temp - profile['Temp']) > 5, 0.2, 0.0)
+                     - np.where(moisture < profile['Moisture'] * 0.6, 0.2, 0.0)
+                     - np.where((rainfall < profile['Rainfall'] * 0.5) & (irrigation == 'Rainfed'), 0.4, 0.0))
+
+    # Fertilizer Impact: diminishing returns curve logic (simplified)
+    fert_boost = np.where(has_fertilizer, np.minimum(0.3, (dosage / 200.0) * 0.3), 0.0)
+
+    # Irrigation Impact
+    irri_boost = np.select([np.isin(irrigation, ['Drip', 'Sprinkler']), irrigation == 'Flood'], [0.2, 0.1], 0.0)
+
+    noise = rng.normal(0, 0.5, size)
+    yield_per_ha = POTENTIAL_TABLE[crop_idx] * nutrient_score * weather_score * (1 + fert_boost + irri_boost) + noise
+    yield_per_ha = np.maximum(0.1, yield_per_ha)  # Ensure positive
+
+    return pd.DataFrame({
+        'Crop_Type': np.asarray(CROPS)[crop_idx],
+        'Nitrogen': n, 'Phosphorus': p, 'Potassium': k,
+        'Soil_pH': np.round(ph, 1), 'Soil_Moisture': np.round(moisture, 1),
+        'Soil_Type': np.asarray(SOIL_TYPES)[soil_idx],
+        'Temperature': np.round(temp, 1), 'Rainfall': np.round(rainfall, 1),
+        'Humidity': np.round(humidity, 1), 'Sunlight_Hours': np.round(sunlight, 1),
+        'Fertilizer_Type': np.asarray(FERTILIZER_TYPES)[fertilizer_idx],
+        'Fertilizer_Dosage': np.round(dosage, 1),
+        'Irrigation_Method': irrigation,
+        'Growth_Duration': growth_days,
+        'Season': np.asarray(SEASONS)[season_idx],
+        'Area': area,
+        'Yield_per_Hectare': np.round(yield_per_ha, 3)
+    }, columns=COLUMNS)
+
+
+def iter_chunks(num_rows=NUM_ROWS, seed=SEED, chunk_size=CHUNK_SIZE):
+    rng = np.random.default_rng(seed)
+    for start in range(0, num_rows, chunk_size):
+        yield generate_chunk(rng, min(chunk_size, num_rows - start))
+
+
+def generate_data(num_rows=NUM_ROWS, seed=SEED, chunk_size=CHUNK_SIZE,
+                  output_path='data/crop_yield_dataset.csv'):
+    # Written chunk by chunk so memory stays flat regardless of num_rows
+    for i, chunk in enumerate(iter_chunks(num_rows, seed, chunk_size)):
+        chunk.to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    print(f"Dataset generated with {num_rows} rows at {output_path}")
+
 
 if __name__ == "__main__":
-    generate_data()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the synthetic crop yield dataset")
+    parser.add_argument('--rows', type=int, default=NUM_ROWS)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--output', default='data/crop_yield_dataset.csv')
+    args = parser.parse_args()
+
+    generate_data(args.rows, args.seed, args.chunk_size, args.output)
@@ -0,0 +1,219 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import FunctionTransformer, StandardScaler, OneHotEncoder, OrdinalEncoder
+
+from request_log import RequestLogger, get_logger
+
+# Precompiled inference for the saved sklearn Pipeline.
+#
+# The pipeline spends most of a single-row predict building a DataFrame and
+# walking the ColumnTransformer. Here the fitted scaler statistics and one-hot /
+# ordinal category tables are pulled out once at load time, rows are encoded
+# straight into a dense NumPy matrix, and the matrix goes directly to the
+# XGBoost booster.
+
+log = RequestLogger(get_logger())
+
+
+class CompiledPipeline:
+    def __init__(self, n_features, numeric_columns, numeric_positions, mean, scale,
+                 onehot_tables, ordinal_tables, model):
+        self.n_features = n_features
+        self.numeric_columns = list(numeric_columns)
+        self.numeric_positions = np.asarray(numeric_positions, dtype=np.intp)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        # [(column, {category: output position}), ...]
+        self.onehot_tables = list(onehot_tables)
+        # [(column, output position, {category: code}, code if unknown, code if missing), ...]
+        self.ordinal_tables = list(ordinal_tables)
+        self.model = model
+
+        self.booster = None
+        self.missing = np.nan
+        self.iteration_range = (0, 0)
+        if hasattr(model, 'get_booster'):
+            self.booster = model.get_booster()
+            self.missing = model.missing
+            try:
+                self.iteration_range = (0, model.best_iteration + 1)
+            except AttributeError:
+                pass  # no early stopping, use every tree
+        elif hasattr(model, 'inplace_predict'):
+            # A bare xgboost.Booster, e.g. loaded from a model bundle
+            self.booster = model
+
+    def encode_row(self, record):
+        """Encode one record (dict) into a (1, n_features) float32 matrix."""
+        x = np.zeros(self.n_features, dtype=np.float64)
+        x[self.numeric_positions] = [record[name] for name in self.numeric_columns]
+        x[self.numeric_positions] = (x[self.numeric_positions] - self.mean) / self.scale
+        for name, table in self.onehot_tables:
+            position = table.get(record[name])
+            if position is not None:
+                x[position] = 1.0
+        for name, position, table, unknown, missing in self.ordinal_tables:
+            value = record[name]
+            x[position] = missing if pd.isna(value) else table.get(value, unknown)
+        return x.astype(np.float32).reshape(1, -1)
+
+    def encode(self, frame):
+        """Encode a DataFrame (or dict of column arrays) into an (n, n_features) float32 matrix."""
+        numeric = np.column_stack([np.asarray(frame[name]) for name in self.numeric_columns])
+        # Scale in the input's precision, as StandardScaler does: float32 columns are scaled in
+        # float32, anything else in float64. A result one ulp off can cross a split threshold.
+        dtype = np.float32 if numeric.dtype == np.float32 else np.float64
+        numeric = numeric.astype(dtype, copy=False)
+        X = np.zeros((len(numeric), self.n_features), dtype=np.float64)
+        X[:, self.numeric_positions] = (numeric - self.mean.astype(dtype)) / self.scale.astype(dtype)
+        for name, table in self.onehot_tables:
+            positions = pd.Series(np.asarray(frame[name], dtype=object)).map(table).to_numpy(dtype=np.float64)
+            known = ~np.isnan(positions)
+            X[np.flatnonzero(known), positions[known].astype(np.intp)] = 1.0
+        for name, position, table, unknown, missing in self.ordinal_tables:
+            values = pd.Series(np.asarray(frame[name], dtype=object))
+            codes = values.map(table).to_numpy(dtype=np.float64)
+            X[:, position] = np.where(values.isna(), missing, np.where(np.isnan(codes), unknown, codes))
+        return X.astype(np.float32)
+
+    def predict_matrix(self, X):
+        if self.booster is not None:
+            return self.booster.inplace_predict(X, iteration_range=self.iteration_range, missing=self.missing)
+        return self.model.predict(X)
+
+    def predict(self, frame):
+        return self.predict_matrix(self.encode(frame))
+
+    def predict_row(self, record):
+        return self.predict_matrix(self.encode_row(record))[0]
+
+
+def compile_pipeline(pipeline):
+    """Build a CompiledPipeline from a fitted Pipeline(preprocessor, model).
+
+    Raises ValueError if the preprocessor uses a transformer this module
+    cannot reproduce.
+    """
+    preprocessor = pipeline.steps[0][1]
+    model = pipeline.steps[-1][1]
+    if not isinstance(preprocessor, ColumnTransformer):
+        raise ValueError(f"Unsupported preprocessor: {type(preprocessor).__name__}")
+
+    numeric_columns, numeric_positions, mean, scale = [], [], [], []
+    onehot_tables, ordinal_tables = [], []
+    position = 0
+
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        if transformer == 'passthrough' or (isinstance(transformer, FunctionTransformer) and transformer.func is None):
+            # Fitted 'passthrough' columns show up as an identity FunctionTransformer
+            numeric_columns += columns
+            numeric_positions += range(position, position + len(columns))
+            mean += [0.0] * len(columns)
+            scale += [1.0] * len(columns)
+            position += len(columns)
+        elif isinstance(transformer, StandardScaler):
+            numeric_columns += columns
+            numeric_positions += range(position, position + len(columns))
+            mean += list(transformer.mean_) if transformer.with_mean else [0.0] * len(columns)
+            scale += list(transformer.scale_) if transformer.with_std else [1.0] * len(columns)
+            position += len(columns)
+        elif isinstance(transformer, OneHotEncoder):
+            if transformer.drop_idx_ is not None or getattr(transformer, 'infrequent_categories_', None):
+                raise ValueError(f"Unsupported OneHotEncoder options in '{name}'")
+            if transformer.handle_unknown != 'ignore':
+                raise ValueError(f"OneHotEncoder '{name}' must use handle_unknown='ignore'")
+            for column, categories in zip(columns, transformer.categories_):
+                onehot_tables.append((column, {value: position + i for i, value in enumerate(categories)}))
+                position += len(categories)
+        elif isinstance(transformer, OrdinalEncoder):
+            if transformer.handle_unknown != 'use_encoded_value' or getattr(transformer, 'infrequent_categories_', None):
+                raise ValueError(f"OrdinalEncoder '{name}' must use handle_unknown='use_encoded_value'")
+            for column, categories in zip(columns, transformer.categories_):
+                table = {value: float(i) for i, value in enumerate(categories) if not pd.isna(value)}
+                ordinal_tables.append((column, position, table, float(transformer.unknown_value),
+                                       float(transformer.encoded_missing_value)))
+                position += 1
+        else:
+            raise ValueError(f"Unsupported transformer '{name}': {type(transformer).__name__}")
+
+    return CompiledPipeline(position, numeric_columns, numeric_positions, mean, scale,
+                            onehot_tables, ordinal_tables, model)
+
+
+def model_input_columns(pipeline):
+    """Input columns the fitted preprocessor actually reads (dropped columns excluded)."""
+    columns = []
+    for _, transformer, selected in pipeline.steps[0][1].transformers_:
+        if transformer != 'drop':
+            columns += list(selected)
+    return columns
+
+
+def probe_frame(compiled, n_rows=512, seed=0):
+    """Synthetic rows covering every known category plus unseen ones."""
+    rng = np.random.default_rng(seed)
+    frame = {}
+    for i, name in enumerate(compiled.numeric_columns):
+        frame[name] = compiled.mean[i] + compiled.scale[i] * rng.normal(0, 1.5, n_rows)
+    tables = [(name, table) for name, table in compiled.onehot_tables]
+    tables += [(name, table) for name, _, table, _, _ in compiled.ordinal_tables]
+    for name, table in tables:
+        values = list(table) + ['__unseen__', None]
+        frame[name] = np.asarray(values, dtype=object)[rng.integers(0, len(values), n_rows)]
+    return pd.DataFrame(frame)
+
+
+def check_parity(pipeline, compiled, frame=None, rtol=1e-5, atol=1e-4):
+    """Compare compiled predictions against the full pipeline.
+
+    Returns the maximum absolute difference; raises AssertionError when the
+    two disagree beyond tolerance.
+    """
+    if frame is None:
+        frame = probe_frame(compiled)
+    expected = np.asarray(pipeline.predict(frame), dtype=np.float64)
+    actual = np.asarray(compiled.predict(frame), dtype=np.float64)
+    single = np.array([compiled.predict_row(row) for row in frame.head(32).to_dict('records')])
+
+    np.testing.assert_allclose(actual, expected, rtol=rtol, atol=atol)
+    np.testing.assert_allclose(single, expected[:len(single)], rtol=rtol, atol=atol)
+    return float(np.max(np.abs(actual - expected)))
+
+
+def load_compiled(pipeline):
+    """Compile and parity-check a pipeline; returns None if it cannot be used."""
+    try:
+        compiled = compile_pipeline(pipeline)
+        max_diff = check_parity(pipeline, compiled)
+    except (ValueError, AssertionError) as e:
+        log.event('fast_inference_disabled', logging.WARNING, error=str(e))
+        return None
+    log.event('fast_inference_enabled', max_parity_diff=max_diff)
+    return compiled
+
+
+if __name__ == "__main__":
+    # Parity + latency check against the saved model: python fast_inference.py
+    import time
+    import joblib
+
+    pipeline = joblib.load('models/crop_yield_xgb.pkl')
+    compiled = compile_pipeline(pipeline)
+    print(f"Parity OK, max abs diff {check_parity(pipeline, compiled):.2e}")
+
+    frame = probe_frame(compiled, n_rows=1)
+    record = frame.to_dict('records')[0]
+    for label, fn, repeats in [('pipeline', lambda: pipeline.predict(frame), 200),
+                               ('compiled', lambda: compiled.predict_row(record), 2000)]:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        p50, p99 = np.percentile(timings, [50, 99]) * 1e3
+        print(f"{label:>9}: p50 {p50:.3f} ms, p99 {p99:.3f} ms")
@@ -0,0 +1,35 @@
+import gc
+import os
+
+# Picked up automatically by `gunicorn app:app` when started from backend/.
+#
+# preload_app imports app.py (and loads the model) once in the master before
+# workers are forked, so every worker starts already warm and shares the
+# model's memory pages copy-on-write. Set GUNICORN_PRELOAD=0 to load per
+# worker instead, e.g. together with LAZY_MODEL_LOAD=1.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# SERVER_MODE=wsgi: Flask app on sync workers (one request per worker at a
+# time, or --threads N). SERVER_MODE=asgi: asgi_app on uvicorn workers (from the
+# uvicorn-worker package; uvicorn.workers is deprecated), each
+# serving many connections on an event loop with model calls in a thread pool.
+# wsgi_app is only used when no app is given on the command line (Procfile: `gunicorn`).
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'asgi_app:app'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'app:app'
+
+
+def on_starting(server):
+    # Per-worker metric files from a previous run would be summed into /metrics
+    from metrics import SharedMetrics
+    SharedMetrics(None, os.environ.get('METRICS_DIR', 'data/metrics')).clear()
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach, so a GC
+    # pass in a worker does not write to (and un-share) the master's objects
+    if preload_app:
+        gc.freeze()
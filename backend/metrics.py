@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from request_log import RequestLogger, get_logger
+
+log = RequestLogger(get_logger())
+
+
+def exponential_buckets(start, factor, count):
+    return [start * factor ** i for i in range(count)]
+
+
+class Histogram:
+    """Fixed-bucket histogram; cheap to observe and mergeable across processes."""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def percentile(self, q):
+        """Estimate the q-th percentile (0-100) by interpolating inside its bucket."""
+        if self.count == 0:
+            return None
+        target = self.count * q / 100.0
+        cumulative = 0
+        for i, c in enumerate(self.counts):
+            if c and cumulative + c >= target:
+                if i == 0:
+                    return self.bounds[0]
+                lower = self.bounds[i - 1]
+                if i == len(self.bounds):
+                    return lower
+                return lower + (self.bounds[i] - lower) * (target - cumulative) / c
+            cumulative += c
+        return self.bounds[-1]
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self.counts)
+            count, total = self.count, self.sum
+        return {
+            'count': count,
+            'sum': total,
+            'mean': total / count if count else None,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'buckets': {str(b): c for b, c in zip(self.bounds + ['+Inf'], counts)}
+        }
+
+    def export(self):
+        """Raw bucket counts for merging with the same histogram from other processes."""
+        with self._lock:
+            return {'bounds': list(self.bounds), 'counts': list(self.counts),
+                    'count': self.count, 'sum': self.sum}
+
+
+# Seconds, 50us .. ~6.5s
+LATENCY_BUCKETS = exponential_buckets(0.00005, 2, 18)
+
+
+class MetricsRegistry:
+    """Labelled histograms and counters for one process, created on first use."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = list(bounds)
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.bounds))
+        return histogram
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = list(self._counters.items())
+        return {
+            'histograms': [dict(name=name, labels=dict(labels), **h.export()) for (name, labels), h in histograms],
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in counters]
+        }
+
+
+def merge_snapshots(snapshots):
+    """Sum registry snapshots (e.g. one per gunicorn worker) series by series."""
+    histograms, counters = {}, {}
+    for snapshot in snapshots:
+        for h in snapshot['histograms']:
+            key = (h['name'], tuple(sorted(h['labels'].items())), tuple(h['bounds']))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = dict(h, counts=list(h['counts']))
+            else:
+                merged['counts'] = [a + b for a, b in zip(merged['counts'], h['counts'])]
+                merged['count'] += h['count']
+                merged['sum'] += h['sum']
+        for c in snapshot['counters']:
+            key = (c['name'], tuple(sorted(c['labels'].items())))
+            counters[key] = dict(c, value=counters.get(key, {'value': 0})['value'] + c['value'])
+    return {'histograms': list(histograms.values()), 'counters': list(counters.values())}
+
+
+def _labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + '}'
+
+
+def render_prometheus(snapshot, descriptions=None):
+    """Prometheus text exposition format (version 0.0.4) for a (merged) snapshot."""
+    descriptions = descriptions or {}
+    lines = []
+    by_name = {}
+    for h in snapshot['histograms']:
+        by_name.setdefault(h['name'], ('histogram', []))[1].append(h)
+    for c in snapshot['counters']:
+        by_name.setdefault(c['name'], ('counter', []))[1].append(c)
+
+    for name in sorted(by_name):
+        kind, series = by_name[name]
+        if name in descriptions:
+            lines.append(f"# HELP {name} {descriptions[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+        for s in sorted(series, key=lambda s: sorted(s['labels'].items())):
+            if kind == 'counter':
+                lines.append(f"{name}{_labels(s['labels'])} {s['value']}")
+                continue
+            cumulative = 0
+            for bound, count in zip(s['bounds'] + ['+Inf'], s['counts']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(s['labels'], le=bound)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(s['labels'])} {s['sum']}")
+            lines.append(f"{name}_count{_labels(s['labels'])} {s['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+class SharedMetrics:
+    """Aggregates a MetricsRegistry across the processes of one server.
+
+    Every process writes its snapshot to <directory>/<pid>.json at most every
+    `interval` seconds from a background thread (restarted after fork, like
+    MicroBatcher's), and collect() sums all files. Files of exited workers
+    are kept so totals never go backwards; clear() at server start.
+    """
+
+    def __init__(self, registry, directory, interval=1.0):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                os.makedirs(self.directory, exist_ok=True)
+                threading.Thread(target=self._run, name='metrics-writer', daemon=True).start()
+                self._pid = os.getpid()
+
+    def flush(self):
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        staging = path + '.tmp'
+        with open(staging, 'w') as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(staging, path)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except OSError as e:
+                log.event('metrics_flush_failed', logging.WARNING, error=str(e))
+
+    def collect(self):
+        """Merged snapshot of every process, including this one's latest values."""
+        self.flush()
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # being replaced right now; picked up on the next scrape
+        return merge_snapshots(snapshots)
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(('.json', '.tmp')):
+                    os.remove(os.path.join(self.directory, name))
+
+
+class StageTimer:
+    """Times consecutive stages of one request into a registry's histograms."""
+
+    def __init__(self, registry, name, **labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start = self._last = time.perf_counter()
+        self.stages = {}
+
+    def lap(self, stage):
+        """Record the time since the previous lap (or the start) as `stage`."""
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.registry.histogram(self.name, stage=stage, **self.labels).observe(elapsed)
+        self.stages[stage] = elapsed
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from fast_inference import CompiledPipeline, compile_pipeline, model_input_columns, probe_frame
+from request_log import RequestLogger, get_logger
+
+# Versioned model bundle: the serving artifact written at the end of training.
+#
+# A bundle is a directory holding the XGBoost booster in its native UBJSON
+# format plus manifest.json with everything the encoder needs (feature order,
+# scaler statistics, one-hot / ordinal category tables, feature types).
+# Loading it rebuilds a CompiledPipeline without unpickling any sklearn
+# objects, so it starts faster than the .pkl and does not depend on the
+# sklearn version the model was trained with.
+
+log = RequestLogger(get_logger())
+
+BUNDLE_FORMAT = 1
+MANIFEST_FILE = 'manifest.json'
+BOOSTER_FILE = 'booster.ubj'
+
+
+def _nan_to_none(value):
+    return None if np.isnan(value) else value
+
+
+def _none_to_nan(value):
+    return np.nan if value is None else float(value)
+
+
+def build_manifest(compiled, input_columns, version):
+    """JSON-serializable description of a CompiledPipeline's encoder and booster settings."""
+    import xgboost
+
+    return {
+        'format': BUNDLE_FORMAT,
+        'version': version,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'xgboost_version': xgboost.__version__,
+        'booster_file': BOOSTER_FILE,
+        'input_columns': list(input_columns),
+        'n_features': compiled.n_features,
+        'feature_types': compiled.booster.feature_types,
+        'numeric': {
+            'columns': compiled.numeric_columns,
+            'positions': compiled.numeric_positions.tolist(),
+            'mean': compiled.mean.tolist(),
+            'scale': compiled.scale.tolist()
+        },
+        'onehot': [{'column': name, 'positions': table} for name, table in compiled.onehot_tables],
+        'ordinal': [{'column': name, 'position': position, 'codes': table,
+                     'unknown': _nan_to_none(unknown), 'missing': _nan_to_none(missing)}
+                    for name, position, table, unknown, missing in compiled.ordinal_tables],
+        'iteration_range': list(compiled.iteration_range),
+        'missing': _nan_to_none(float(compiled.missing))
+    }
+
+
+def export_bundle(pipeline, path, version=None):
+    """Write a fitted Pipeline(preprocessor, XGBRegressor) as a bundle directory at path.
+
+    The bundle is written next to path and renamed into place, and is
+    loaded back and checked against the pipeline before that, so a reader
+    never sees a partial or mismatching bundle. Returns the manifest.
+    """
+    compiled = compile_pipeline(pipeline)
+    if compiled.booster is None:
+        raise ValueError(f"Model step is not an XGBoost estimator: {type(compiled.model).__name__}")
+    version = version or time.strftime('%Y%m%d-%H%M%S', time.gmtime())
+    manifest = build_manifest(compiled, model_input_columns(pipeline), version)
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.bundle-', dir=parent)
+    os.chmod(staging, 0o755)
+    try:
+        compiled.booster.save_model(os.path.join(staging, BOOSTER_FILE))
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        frame = probe_frame(compiled)
+        expected = np.asarray(pipeline.predict(frame), dtype=np.float64)
+        actual = np.asarray(load_bundle(staging, warm_up=False).predict(frame), dtype=np.float64)
+        np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-4)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.rename(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format')!r} in {path}")
+    return manifest
+
+
+def load_bundle(path, warm_up=True):
+    """Load a bundle directory into a CompiledPipeline (its .manifest holds the parsed manifest)."""
+    import xgboost
+
+    manifest = read_manifest(path)
+    booster = xgboost.Booster()
+    booster.load_model(os.path.join(path, manifest['booster_file']))
+
+    numeric = manifest['numeric']
+    ordinal_tables = [(t['column'], t['position'], t['codes'], _none_to_nan(t['unknown']),
+                       _none_to_nan(t['missing'])) for t in manifest['ordinal']]
+    compiled = CompiledPipeline(manifest['n_features'], numeric['columns'], numeric['positions'],
+                                numeric['mean'], numeric['scale'],
+                                [(t['column'], t['positions']) for t in manifest['onehot']],
+                                ordinal_tables, booster)
+    compiled.iteration_range = tuple(manifest['iteration_range'])
+    compiled.missing = _none_to_nan(manifest['missing'])
+    compiled.manifest = manifest
+
+    if warm_up:
+        # First predict allocates XGBoost's prediction buffers; do it before serving
+        compiled.predict(probe_frame(compiled, n_rows=8))
+    return compiled
+
+
+class ServingModel:
+    """The model the API scores with: a bundle, a pickled Pipeline (optionally compiled) or an edge model."""
+
+    def __init__(self, pipeline, compiled, version, source, load_seconds):
+        self.pipeline = pipeline
+        self.compiled = compiled
+        self.version = version
+        self.source = source
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        if pipeline is not None:
+            self.input_columns = model_input_columns(pipeline)
+        else:
+            self.input_columns = compiled.manifest['input_columns']
+        # Cached predictions are tied to the model they came from
+        self.cache_namespace = f"{source}:{version}"
+
+    def predict(self, df):
+        if self.compiled is not None:
+            return self.compiled.predict(df)
+        return self.pipeline.predict(df)
+
+    def predict_row(self, record):
+        if self.compiled is not None:
+            # Encode the record directly and score it on the booster
+            return float(self.compiled.predict_row(record))
+        # The pipeline handles scaling and encoding internally
+        return float(self.pipeline.predict(pd.DataFrame([record]))[0])
+
+    def predict_records(self, records):
+        if self.compiled is not None:
+            return self.compiled.predict_matrix(np.vstack([self.compiled.encode_row(r) for r in records]))
+        return self.pipeline.predict(pd.DataFrame(records))
+
+
+def _load_edge(edge_path, start):
+    from edge_model import load_edge_model
+
+    if not edge_path or not os.path.exists(edge_path):
+        log.event('model_not_found', logging.ERROR, path=edge_path, format='edge')
+        return None
+    edge = load_edge_model(edge_path)
+    model = ServingModel(None, edge, edge.manifest['version'], edge_path, time.perf_counter() - start)
+    log.event('model_loaded', version=model.version, format='edge', path=edge_path, trees=edge.n_trees,
+              load_seconds=round(model.load_seconds, 3))
+    return model
+
+
+def load_serving_model(bundle_path, pickle_path, model_format='auto', fast_inference=True, edge_path=None):
+    """Load the model to serve; returns None when there is none on disk.
+
+    model_format: 'bundle', 'pickle', 'edge', or 'auto' to prefer the bundle when
+    bundle_path exists (see model_registry.resolve for registries). fast_inference only applies to the pickle, which
+    is compiled and parity-checked on load; a bundle is always compiled.
+    edge_path is the NumPy-only edge model (edge_model.py): served with
+    'edge', and the fallback when the bundle or pickle is missing or cannot be
+    loaded (e.g. XGBoost is not installed).
+    """
+    start = time.perf_counter()
+    if model_format == 'edge':
+        return _load_edge(edge_path, start)
+
+    use_bundle = model_format == 'bundle' or (
+        model_format == 'auto' and os.path.exists(os.path.join(bundle_path, MANIFEST_FILE)))
+    has_edge = edge_path is not None and os.path.exists(edge_path)
+
+    try:
+        if use_bundle:
+            compiled = load_bundle(bundle_path)
+            model = ServingModel(None, compiled, compiled.manifest['version'], bundle_path,
+                                 time.perf_counter() - start)
+            log.event('model_loaded', version=model.version, format='bundle', path=bundle_path,
+                      load_seconds=round(model.load_seconds, 3))
+            return model
+
+        if not os.path.exists(pickle_path):
+            log.event('model_not_found', logging.ERROR, path=pickle_path, format='pickle')
+            return _load_edge(edge_path, start) if has_edge else None
+        import joblib
+        from fast_inference import load_compiled
+
+        pipeline = joblib.load(pickle_path)
+    except (ImportError, OSError, ValueError) as e:
+        if not has_edge:
+            raise
+        log.event('model_edge_fallback', logging.WARNING, error=str(e))
+        return _load_edge(edge_path, start)
+
+    compiled = load_compiled(pipeline) if fast_inference else None
+    model = ServingModel(pipeline, compiled, str(os.path.getmtime(pickle_path)), pickle_path,
+                         time.perf_counter() - start)
+    log.event('model_loaded', version=model.version, format='pickle', path=pickle_path,
+              fast_inference=compiled is not None, load_seconds=round(model.load_seconds, 3))
+    return model
+
+
+if __name__ == "__main__":
+    # Export an existing pickled pipeline: python model_bundle.py models/crop_yield_xgb.pkl models/crop_yield_xgb
+    import argparse
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export a pickled XGBoost pipeline as a model bundle")
+    parser.add_argument('pipeline', help="Pipeline .pkl written by train_pipeline.py")
+    parser.add_argument('output', help="Bundle directory to write")
+    parser.add_argument('--version', default=None, help="Bundle version (default: UTC timestamp)")
+    args = parser.parse_args()
+
+    manifest = export_bundle(joblib.load(args.pipeline), args.output, version=args.version)
+    print(f"Exported bundle {manifest['version']} ({manifest['n_features']} features) to {args.output}")
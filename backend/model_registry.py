@@ -0,0 +1,180 @@
+import logging
+import os
+import shutil
+import threading
+import time
+
+from model_bundle import MANIFEST_FILE, export_bundle, read_manifest
+from request_log import RequestLogger, get_logger
+
+# On-disk registry of model bundles:
+#
+#   models/crop_yield_xgb/
+#       20261017-193649/      one bundle per version (booster.ubj + manifest.json)
+#       20261102-081500/
+#       current               name of the version the API serves
+#
+# Publishing writes the new version's folder first and then replaces the
+# pointer file in one rename, so a reader sees either the old or the new
+# version, never a partial one. ModelWatcher lets every API worker pick up a
+# pointer change and swap models without a restart.
+
+log = RequestLogger(get_logger())
+
+CURRENT_FILE = 'current'
+
+
+def list_versions(root):
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if os.path.exists(os.path.join(root, name, MANIFEST_FILE)))
+
+
+def current_version(root):
+    """Version named by root's pointer file, or None if root is not a registry."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_path(root, version=None):
+    """Bundle directory for version (default: the current one)."""
+    version = version or current_version(root)
+    if version is None:
+        raise ValueError(f"No current model version in {root}")
+    path = os.path.join(root, version)
+    if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        raise ValueError(f"Unknown model version {version!r} in {root}")
+    return path
+
+
+def resolve(root, version=None):
+    """Bundle directory to load from root: a version of a registry, or root itself if it is a plain bundle."""
+    if version is None and current_version(root) is None:
+        return root
+    return version_path(root, version)
+
+
+def activate(root, version):
+    """Point the registry at an existing version (also used to roll back)."""
+    version_path(root, version)
+    staging = os.path.join(root, f'.{CURRENT_FILE}.{os.getpid()}')
+    with open(staging, 'w') as f:
+        f.write(version + '\n')
+    os.replace(staging, os.path.join(root, CURRENT_FILE))
+
+
+def prune(root, keep=5):
+    """Delete all but the newest `keep` versions; the current version is always kept."""
+    current = current_version(root)
+    versions = [v for v in list_versions(root) if v != current]
+    for version in versions[:max(0, len(versions) - max(0, keep - 1))]:
+        shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+
+
+def publish(pipeline, root, version=None, make_current=True, keep=5):
+    """Export a fitted pipeline as a new registry version; returns its manifest."""
+    version = version or time.strftime('%Y%m%d-%H%M%S', time.gmtime())
+    if os.path.exists(os.path.join(root, version)):
+        raise ValueError(f"Model version {version!r} already exists in {root}")
+    manifest = export_bundle(pipeline, os.path.join(root, version), version=version)
+    if make_current:
+        activate(root, version)
+        prune(root, keep)
+    return manifest
+
+
+class ModelWatcher:
+    """Polls a registry's pointer file and calls reload_fn(version) when it changes.
+
+    The poll thread starts lazily and is restarted after fork, so each
+    gunicorn worker watches (and reloads) on its own.
+    """
+
+    def __init__(self, root, reload_fn, version_fn, interval=5.0):
+        self.root = root
+        self.reload_fn = reload_fn      # reload_fn(version) loads and swaps in that version
+        self.version_fn = version_fn    # version_fn() -> version currently served
+        self.interval = interval
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.failed_version = None      # last target that failed to load; not retried until the pointer moves
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                threading.Thread(target=self._run, name='model-watcher', daemon=True).start()
+                self._pid = os.getpid()
+
+    def check(self):
+        """Reload if the pointer names a different version; returns True when a reload happened."""
+        target = current_version(self.root)
+        if target is None or target == self.version_fn() or target == self.failed_version:
+            return False
+        try:
+            self.reload_fn(target)
+        except Exception as e:
+            # Keep serving the old version; a broken version is not retried on every poll,
+            # only once the pointer names another one (or POST /admin/reload asks for it)
+            self.failures += 1
+            self.failed_version = target
+            self.last_error = f"{target}: {e}"
+            log.event('model_reload_failed', logging.ERROR, version=target, error=str(e))
+            return False
+        self.failed_version = None
+        self.reloads += 1
+        return True
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
+
+    def stats(self):
+        return {
+            'registry': self.root,
+            'interval_seconds': self.interval,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'failed_version': self.failed_version,
+            'last_error': self.last_error
+        }
+
+
+if __name__ == "__main__":
+    # python model_registry.py list | activate VERSION | publish PIPELINE.pkl [--version V]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the model registry served by app.py")
+    parser.add_argument('--root', default='models/crop_yield_xgb', help="Registry directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="Show versions; * marks the current one")
+    activate_cmd = commands.add_parser('activate', help="Make a version current (running APIs reload it)")
+    activate_cmd.add_argument('version')
+    publish_cmd = commands.add_parser('publish', help="Add a pickled pipeline as a new version")
+    publish_cmd.add_argument('pipeline')
+    publish_cmd.add_argument('--version', default=None)
+    publish_cmd.add_argument('--no-activate', action='store_true', help="Publish without making it current")
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        current = current_version(args.root)
+        for version in list_versions(args.root):
+            manifest = read_manifest(os.path.join(args.root, version))
+            print(f"{'*' if version == current else ' '} {version}  created {manifest['created_at']}")
+    elif args.command == 'activate':
+        activate(args.root, args.version)
+        print(f"Current version of {args.root} is now {args.version}")
+    else:
+        import joblib
+        manifest = publish(joblib.load(args.pipeline), args.root, version=args.version,
+                           make_current=not args.no_activate)
+        print(f"Published {manifest['version']} to {args.root}")
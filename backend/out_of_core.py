@@ -0,0 +1,167 @@
+import os
+import time
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.pipeline import Pipeline
+from xgboost import XGBRegressor
+
+from data_loader import iter_chunks, TARGET
+from preprocessing import build_preprocessor, xgb_feature_types
+from schema import valid_rows
+
+# Out-of-core training for the XGBoost yield model.
+#
+# The dataset is streamed chunk by chunk through a preprocessor that is fitted
+# once, and fed to XGBoost through its DataIter interface. Only one raw chunk
+# is in memory at a time; XGBoost keeps either a compressed quantile matrix
+# (QuantileDMatrix) or pages in an on-disk cache (external memory).
+
+DEFAULT_PARAMS = {
+    'objective': 'reg:squarederror',
+    'tree_method': 'hist',
+    'learning_rate': 0.1,
+    'max_depth': 6,
+    'seed': 42
+}
+
+
+def clean_chunk(df):
+    # Same filter as the in-memory path: positive yield, and every feature valid under the API's schema
+    return df[(df[TARGET] > 0).to_numpy() & valid_rows(df)]
+
+
+def fit_streaming_preprocessor(path, chunk_size, numerical_features, categorical_features):
+    """Fit the ColumnTransformer without loading the whole dataset.
+
+    Category sets come from a pass over the categorical columns only, so
+    every code is known up front; the remaining fit runs on the first chunk.
+    """
+    categories = {name: set() for name in categorical_features}
+    for chunk in iter_chunks(path, chunk_size, columns=categorical_features):
+        for name in categorical_features:
+            categories[name].update(chunk[name].dropna().unique())
+
+    preprocessor = build_preprocessor(numerical_features, categorical_features,
+                                      categories=[sorted(categories[name]) for name in categorical_features])
+    first = next(iter_chunks(path, chunk_size, columns=numerical_features + categorical_features + [TARGET]))
+    preprocessor.fit(clean_chunk(first)[numerical_features + categorical_features])
+    return preprocessor
+
+
+class ChunkIter(xgb.DataIter):
+    """Streams (features, label) chunks into XGBoost.
+
+    Rows whose position in the file is a multiple of eval_every form the
+    'eval' split, everything else the 'train' split, so both splits can be
+    produced from the same stream without a separate file.
+    """
+
+    def __init__(self, path, chunk_size, preprocessor, features, split='train', eval_every=10,
+                 cache_prefix=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.preprocessor = preprocessor
+        self.features = features
+        self.split = split
+        self.eval_every = eval_every
+        self.feature_types = xgb_feature_types(preprocessor)
+        self._chunks = None
+        self._offset = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._chunks = None
+        self._offset = 0
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_chunks(self.path, self.chunk_size, columns=self.features + [TARGET])
+        for chunk in self._chunks:
+            positions = np.arange(self._offset, self._offset + len(chunk))
+            self._offset += len(chunk)
+            in_eval = positions % self.eval_every == 0
+            chunk = clean_chunk(chunk[in_eval if self.split == 'eval' else ~in_eval])
+            if len(chunk) == 0:
+                continue
+            input_data(data=self.preprocessor.transform(chunk[self.features]).astype(np.float32),
+                       label=chunk[TARGET].to_numpy(dtype=np.float32),
+                       feature_types=self.feature_types)
+            return True
+        return False
+
+
+def _booster_params(model):
+    """xgb.train params equivalent to a fitted XGBRegressor's configuration."""
+    params = {k: v for k, v in model.get_xgb_params().items() if v is not None}
+    n_jobs = params.pop('n_jobs', None)
+    if n_jobs and n_jobs > 0:
+        params['nthread'] = n_jobs
+    if 'random_state' in params:
+        params['seed'] = params.pop('random_state')
+    return params
+
+
+def _to_regressor(booster):
+    model = XGBRegressor(enable_categorical='c' in (booster.feature_types or []))
+    model.load_model(bytearray(booster.save_raw('ubj')))
+    return model
+
+
+def train_out_of_core(path, numerical_features, categorical_features, chunk_size=500_000,
+                      cache_dir='data/xgb_cache', matrix='quantile', num_rounds=500,
+                      early_stopping_rounds=20, params=None, base_pipeline=None):
+    """Train (or continue training) the yield Pipeline on a dataset streamed from disk.
+
+    matrix: 'quantile' keeps a compressed QuantileDMatrix in RAM; 'external'
+    pages the data through cache_dir so it can exceed memory entirely.
+    base_pipeline: an existing fitted Pipeline to continue boosting from; its
+    preprocessor is reused unchanged so feature columns stay aligned.
+    """
+    start = time.perf_counter()
+    features = numerical_features + categorical_features
+    base_booster = None
+
+    if base_pipeline is not None:
+        preprocessor = base_pipeline.steps[0][1]
+        base_model = base_pipeline.steps[-1][1]
+        base_booster = base_model.get_booster()
+        params = dict(_booster_params(base_model), **(params or {}))
+        print(f"Continuing from existing booster with {base_booster.num_boosted_rounds()} rounds")
+    else:
+        preprocessor = fit_streaming_preprocessor(path, chunk_size, numerical_features, categorical_features)
+        params = dict(DEFAULT_PARAMS, **(params or {}))
+
+    categorical = 'c' in xgb_feature_types(preprocessor)
+    if matrix == 'external':
+        os.makedirs(cache_dir, exist_ok=True)
+        train_iter = ChunkIter(path, chunk_size, preprocessor, features, 'train',
+                               cache_prefix=os.path.join(cache_dir, 'train'))
+        eval_iter = ChunkIter(path, chunk_size, preprocessor, features, 'eval',
+                              cache_prefix=os.path.join(cache_dir, 'eval'))
+        dtrain = xgb.ExtMemQuantileDMatrix(train_iter, enable_categorical=categorical)
+        deval = xgb.ExtMemQuantileDMatrix(eval_iter, ref=dtrain, enable_categorical=categorical)
+    else:
+        # QuantileDMatrix keeps no on-disk cache, only the compressed histogram bins
+        dtrain = xgb.QuantileDMatrix(ChunkIter(path, chunk_size, preprocessor, features, 'train'),
+                                     enable_categorical=categorical)
+        deval = xgb.QuantileDMatrix(ChunkIter(path, chunk_size, preprocessor, features, 'eval'),
+                                    ref=dtrain, enable_categorical=categorical)
+    print(f"Built {matrix} matrices: {dtrain.num_row():,} train / {deval.num_row():,} eval rows "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    booster = xgb.train(params, dtrain, num_boost_round=num_rounds, evals=[(deval, 'eval')],
+                        early_stopping_rounds=early_stopping_rounds, xgb_model=base_booster,
+                        verbose_eval=50)
+    # Keep only the trees up to the best round so the artifact needs no early-stopping state
+    booster = booster[:booster.best_iteration + 1]
+
+    y_eval = deval.get_label()
+    y_pred = booster.predict(deval)
+    print(f"Out-of-core training done in {time.perf_counter() - start:.1f}s: "
+          f"{booster.num_boosted_rounds()} rounds, eval R2 {r2_score(y_eval, y_pred):.4f}, "
+          f"RMSE {np.sqrt(mean_squared_error(y_eval, y_pred)):.4f}")
+
+    return Pipeline(steps=[('preprocessor', preprocessor),
+                           ('model', _to_regressor(booster))])
@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from request_log import RequestLogger, get_logger
+
+# Bounded cache for per-hectare model output.
+#
+# Keys are built only from the features the model consumes, so requests that
+# differ in Area / Area_Unit / Yield_Unit (applied after the model) share an
+# entry. LRUCache lives in one process; SQLiteCache keeps entries in a file
+# that every gunicorn worker on the box can read and write.
+
+log = RequestLogger(get_logger())
+
+
+def make_key(record, columns, decimals=6, namespace=''):
+    parts = [namespace]
+    for name in columns:
+        value = record.get(name)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = round(float(value), decimals) + 0.0  # + 0.0 folds -0.0 into 0.0
+        elif isinstance(value, str):
+            value = value.strip()
+        parts.append(value)
+    return json.dumps(parts, separators=(',', ':'), default=str)
+
+
+class LRUCache:
+    def __init__(self, max_size=10000, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            'backend': 'memory',
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+
+class SQLiteCache:
+    """Cache shared between processes through a SQLite file (WAL mode).
+
+    Size is enforced by trimming the least recently used rows every
+    `prune_every` writes, so the table can briefly exceed max_size.
+    Hit/miss counters are per process.
+    """
+
+    def __init__(self, path, max_size=100000, ttl=3600, prune_every=1000):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS predictions ('
+                     'key TEXT PRIMARY KEY, value REAL NOT NULL, '
+                     'expires_at REAL NOT NULL, accessed_at REAL NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS predictions_accessed ON predictions (accessed_at)')
+        conn.commit()
+
+    def _connection(self):
+        # One connection per thread and per process (connections must not cross fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        try:
+            conn = self._connection()
+            row = conn.execute('SELECT value, expires_at FROM predictions WHERE key = ?', (key,)).fetchone()
+            if row is not None and row[1] <= now:
+                conn.execute('DELETE FROM predictions WHERE key = ?', (key,))
+                self.expirations += 1
+                row = None
+            elif row is not None:
+                conn.execute('UPDATE predictions SET accessed_at = ? WHERE key = ?', (now, key))
+        except sqlite3.Error as e:
+            log.event('prediction_cache_error', logging.WARNING, op='read', error=str(e))
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)',
+                         (key, float(value), now + self.ttl, now))
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._prune(conn, now)
+        except sqlite3.Error as e:
+            log.event('prediction_cache_error', logging.WARNING, op='write', error=str(e))
+
+    def _prune(self, conn, now):
+        self.expirations += conn.execute('DELETE FROM predictions WHERE expires_at <= ?', (now,)).rowcount
+        excess = conn.execute('SELECT COUNT(*) FROM predictions').fetchone()[0] - self.max_size
+        if excess > 0:
+            conn.execute('DELETE FROM predictions WHERE key IN '
+                         '(SELECT key FROM predictions ORDER BY accessed_at LIMIT ?)', (excess,))
+            self.evictions += excess
+
+    def clear(self):
+        self._connection().execute('DELETE FROM predictions')
+
+    def stats(self):
+        try:
+            size = self._connection().execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
+        except sqlite3.Error:
+            size = None
+        return {
+            'backend': 'sqlite',
+            'path': self.path,
+            'size': size,
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+
+def create_cache(backend, max_size, ttl, path='data/prediction_cache.sqlite'):
+    """Build a cache from config: 'memory', 'sqlite' or 'off' (returns None)."""
+    if backend == 'memory':
+        return LRUCache(max_size=max_size, ttl=ttl)
+    if backend == 'sqlite':
+        return SQLiteCache(path, max_size=max_size, ttl=ttl)
+    return None
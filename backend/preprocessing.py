@@ -0,0 +1,73 @@
+import numpy as np
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, OrdinalEncoder
+
+
+def build_preprocessor(numerical_features, categorical_features, encoding='ordinal', categories='auto'):
+    """ColumnTransformer shared by the training scripts.
+
+    Tree models gain nothing from scaling, so the tree layouts pass numerics
+    through unchanged and emit float32:
+
+    'ordinal'       one float32 code column per categorical, unseen or missing
+                    values as NaN. Meant for XGBoost with enable_categorical and
+                    feature_types from xgb_feature_types(), which splits on
+                    category sets natively.
+    'onehot'        float32 indicator columns, kept sparse when the output is
+                    sparse enough; for sklearn forests, which have no native
+                    categorical splits.
+    'scaled_onehot' the original StandardScaler + OneHotEncoder layout, for
+                    models that need scaled inputs.
+    """
+    if encoding == 'ordinal':
+        return ColumnTransformer(
+            transformers=[
+                ('num', 'passthrough', numerical_features),
+                ('cat', OrdinalEncoder(categories=categories, handle_unknown='use_encoded_value',
+                                       unknown_value=np.nan, encoded_missing_value=np.nan,
+                                       dtype=np.float32), categorical_features)
+            ],
+            sparse_threshold=0)
+
+    if encoding == 'onehot':
+        return ColumnTransformer(
+            transformers=[
+                ('num', 'passthrough', numerical_features),
+                ('cat', OneHotEncoder(categories=categories, handle_unknown='ignore', dtype=np.float32),
+                 categorical_features)
+            ])
+
+    return ColumnTransformer(
+        transformers=[
+            ('num', StandardScaler(), numerical_features),
+            ('cat', OneHotEncoder(categories=categories, handle_unknown='ignore'), categorical_features)
+        ])
+
+
+def xgb_feature_types(preprocessor):
+    """XGBoost feature_types for a preprocessor's output: 'c' for ordinal-coded columns, 'q' otherwise.
+
+    The preprocessor need not be fitted unless it one-hot encodes with
+    categories='auto', whose column count is only known after fitting.
+    """
+    fitted = hasattr(preprocessor, 'transformers_')
+    types = []
+    for _, transformer, columns in preprocessor.transformers_ if fitted else preprocessor.transformers:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        if isinstance(transformer, OrdinalEncoder):
+            types += ['c'] * len(columns)
+        elif isinstance(transformer, OneHotEncoder):
+            categories = transformer.categories_ if fitted else transformer.categories
+            if isinstance(categories, str):
+                raise ValueError("Fit the preprocessor first: one-hot columns with categories='auto' are not known")
+            types += ['q'] * sum(len(c) for c in categories)
+        else:
+            types += ['q'] * len(columns)
+    return types
+
+
+def to_dense(X):
+    """Densify a sparse encoder output, for estimators that reject sparse input (FunctionTransformer body)."""
+    return X.toarray() if sparse.issparse(X) else X
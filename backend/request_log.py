@@ -0,0 +1,55 @@
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+# Structured request logging for the API.
+#
+# One JSON object per line on stderr (collected by gunicorn / the platform).
+# Successful requests are sampled at LOG_SAMPLE_RATE so logging stays off the
+# hot path under load; errors and slow requests are always logged.
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname.lower(),
+            'event': record.getMessage(),
+            'pid': record.process
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def get_logger(name='yield_api'):
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+        logger.propagate = False
+    return logger
+
+
+class RequestLogger:
+    def __init__(self, logger, sample_rate=0.01, slow_ms=500.0):
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    def event(self, event, level=logging.INFO, **fields):
+        self.logger.log(level, event, extra={'fields': fields})
+
+    def request(self, endpoint, status, duration_ms, **fields):
+        """Log a finished request: always if it failed or was slow, otherwise sampled."""
+        if status < 400 and duration_ms < self.slow_ms and random.random() >= self.sample_rate:
+            return
+        level = logging.WARNING if status >= 400 or duration_ms >= self.slow_ms else logging.INFO
+        self.event('request', level, endpoint=endpoint, status=status,
+                   duration_ms=round(duration_ms, 3), **fields)
@@ -0,0 +1,216 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from data_engine import CROPS, SEASONS
+from dataset_generator import FERTILIZER_TYPES, IRRIGATION_METHODS, SOIL_TYPES
+from units import AREA_TO_HECTARE, TON_TO_YIELD_UNIT, convert_area_to_hectare_array
+
+# The model's input fields, declared once for the API (/predict, /predict/batch,
+# /predict/sweep), score.py and the training scripts.
+#
+# 'category' fields take one of 'categories' (exact match); 'number' fields
+# must lie in [min, max] (None = unbounded); 'unit' fields are matched
+# case-insensitively against the conversion tables in units.py. A default of
+# None makes the field required. Category sets are the union of what the two
+# dataset generators emit ('Complex' is data_engine's fertilizer).
+FIELDS = {
+    'Crop_Type': {'type': 'category', 'categories': CROPS, 'default': None},
+    'Soil_Type': {'type': 'category', 'categories': SOIL_TYPES, 'default': None},
+    'Fertilizer_Type': {'type': 'category', 'categories': FERTILIZER_TYPES + ['Complex'], 'default': 'None'},
+    'Irrigation_Method': {'type': 'category', 'categories': IRRIGATION_METHODS, 'default': None},
+    'Season': {'type': 'category', 'categories': SEASONS, 'default': None},
+    'Nitrogen': {'type': 'number', 'min': 0, 'max': 1000, 'default': 0},             # kg/ha
+    'Phosphorus': {'type': 'number', 'min': 0, 'max': 1000, 'default': 0},           # kg/ha
+    'Potassium': {'type': 'number', 'min': 0, 'max': 1000, 'default': 0},            # kg/ha
+    'Soil_pH': {'type': 'number', 'min': 0, 'max': 14, 'default': 6.5},
+    'Soil_Moisture': {'type': 'number', 'min': 0, 'max': 100, 'default': 50},        # %
+    'Temperature': {'type': 'number', 'min': -50, 'max': 60, 'default': 25},         # Celsius
+    'Rainfall': {'type': 'number', 'min': 0, 'max': 10000, 'default': 100},          # mm
+    'Humidity': {'type': 'number', 'min': 0, 'max': 100, 'default': 60},             # %
+    'Sunlight_Hours': {'type': 'number', 'min': 0, 'max': 24, 'default': 8},
+    'Fertilizer_Dosage': {'type': 'number', 'min': 0, 'max': 2000, 'default': 0},    # kg/ha
+    'Growth_Duration': {'type': 'number', 'min': 0, 'max': 1000, 'default': 120},    # days
+    'Area': {'type': 'number', 'min': 0, 'max': None, 'default': 1}
+}
+
+UNIT_FIELDS = {
+    'Area_Unit': {'type': 'unit', 'categories': list(AREA_TO_HECTARE), 'default': 'Hectare'},
+    'Yield_Unit': {'type': 'unit', 'categories': list(TON_TO_YIELD_UNIT), 'default': 'Ton'}
+}
+
+ALL_FIELDS = {**FIELDS, **UNIT_FIELDS}
+CATEGORICAL_FIELDS = [name for name, spec in FIELDS.items() if spec['type'] == 'category']
+NUMERIC_FIELDS = [name for name, spec in FIELDS.items() if spec['type'] == 'number']
+
+
+class ValidationError(ValueError):
+    """Invalid input; .errors maps each bad field to its message."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('Invalid input: ' + '; '.join(f'{name} {message}' for name, message in errors.items()))
+
+
+def _message(spec):
+    if spec['type'] != 'number':
+        return 'must be one of ' + ', '.join(spec['categories'])
+    low, high = spec['min'], spec['max']
+    if high is None:
+        return f'must be at least {low}'
+    return f'must be between {low} and {high}'
+
+
+def invalid_mask(name, values):
+    """Boolean mask of the values (Series or array-like) that break the rule for name; missing counts as invalid."""
+    spec = ALL_FIELDS[name]
+    if spec['type'] == 'number':
+        values = np.asarray(values, dtype=np.float64)
+        bad = ~np.isfinite(values)
+        if spec['min'] is not None:
+            bad |= values < spec['min']
+        if spec['max'] is not None:
+            bad |= values > spec['max']
+        return bad
+    if not isinstance(values, pd.Series):
+        values = pd.Series(np.asarray(values, dtype=object))
+    if spec['type'] == 'unit':
+        values = values.astype(object).str.lower()
+    return ~values.isin(spec['categories']).to_numpy()
+
+
+def check_values(name, values):
+    """Raise ValidationError if any of values (e.g. a sweep axis) breaks the rule for name."""
+    if invalid_mask(name, values).any():
+        raise ValidationError({name: _message(ALL_FIELDS[name])})
+
+
+def _valid_value(spec, value):
+    # Scalar form of invalid_mask, for single records
+    if spec['type'] == 'number':
+        return math.isfinite(value) and (spec['min'] is None or value >= spec['min']) and (
+            spec['max'] is None or value <= spec['max'])
+    if not isinstance(value, str):
+        return False
+    return (value.lower() if spec['type'] == 'unit' else value) in spec['categories']
+
+
+def validate_frame(raw):
+    """Apply the schema to a DataFrame of records, column by column.
+
+    Returns ({field: column array with defaults applied}, errors) for every
+    field in FIELDS and UNIT_FIELDS; errors maps row position -> {field:
+    message}. Each rule is one vectorized mask over the whole batch; only rows
+    that failed are visited in Python. Missing values (blank CSV cells) take
+    the field's default; JSON nulls are caught per record by null_errors.
+    """
+    n = len(raw)
+    columns = {}
+    invalid = []  # (field, mask, message)
+
+    for name, spec in ALL_FIELDS.items():
+        numeric = spec['type'] == 'number'
+        if name not in raw:
+            if spec['default'] is None:
+                invalid.append((name, np.ones(n, dtype=bool), 'is required'))
+            columns[name] = np.full(n, spec['default'], dtype=np.float64 if numeric else object)
+            continue
+
+        missing = raw[name].isna().to_numpy()
+        if numeric:
+            parsed = pd.to_numeric(raw[name], errors='coerce').to_numpy(dtype=np.float64)
+            not_numeric = ~missing & np.isnan(parsed)
+            if raw[name].dtype == bool or raw[name].dtype == object:
+                # JSON true/false would otherwise coerce to 1.0/0.0
+                not_numeric |= raw[name].map(type).isin((bool, np.bool_)).to_numpy()
+            invalid.append((name, not_numeric, 'must be a number'))
+            values = np.where(missing, np.nan if spec['default'] is None else float(spec['default']), parsed)
+            invalid.append((name, ~missing & ~not_numeric & invalid_mask(name, values), _message(spec)))
+        else:
+            values = np.where(missing, spec['default'], raw[name].astype(object).to_numpy())
+            invalid.append((name, ~missing & invalid_mask(name, values), _message(spec)))
+        if spec['default'] is None:
+            invalid.append((name, missing, 'is required'))
+        columns[name] = values
+
+    errors = {}
+    for name, mask, message in invalid:
+        for i in np.flatnonzero(mask):
+            errors.setdefault(int(i), {})[name] = message
+    return columns, errors
+
+
+def build_batch_frame(raw):
+    """Turn a raw DataFrame of request records into model input.
+
+    Validation (validate_frame) runs column by column over the whole
+    batch, so the cost is proportional to the number of fields, not records.
+    Returns the feature frame (Area in hectares), the area and yield unit
+    arrays, and a dict of per-record errors keyed by row position.
+    """
+    columns, errors = validate_frame(raw)
+    area_units = columns.pop('Area_Unit')
+    yield_units = columns.pop('Yield_Unit')
+    columns['Area'] = convert_area_to_hectare_array(columns['Area'], area_units)
+    return pd.DataFrame(columns, index=raw.index), area_units, yield_units, errors
+
+
+def null_errors(record):
+    """{field: message} for the schema fields a JSON record sends as null.
+
+    A frame cannot tell null from absent, so JSON batch parsers check each
+    record with this before building one; blank CSV cells still take the default.
+    """
+    return {name: 'must not be null' for name, value in record.items() if value is None and name in ALL_FIELDS}
+
+
+def validate_record(data, optional=()):
+    """Apply the schema to one request dict; returns {field: value} with defaults applied.
+
+    Same rules as validate_frame, checked per value (a single record does not
+    pay for building a frame). Fields in optional may be left out even if
+    required (they come back as None); a field sent as null is an error, not a
+    request for the default, as null_errors reports for JSON batches. Raises
+    ValidationError.
+    """
+    record = {}
+    errors = {}
+    for name, spec in ALL_FIELDS.items():
+        if name not in data:
+            if spec['default'] is None and name not in optional:
+                errors[name] = 'is required'
+            record[name] = None if spec['default'] is None else (
+                float(spec['default']) if spec['type'] == 'number' else spec['default'])
+            continue
+
+        value = data[name]
+        if value is None:
+            errors[name] = 'must not be null'
+            continue
+        if spec['type'] == 'number':
+            if isinstance(value, (bool, np.bool_)):
+                # float(True) would pass as 1.0
+                errors[name] = 'must be a number'
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                errors[name] = 'must be a number'
+                continue
+        if not _valid_value(spec, value):
+            errors[name] = _message(spec)
+        record[name] = value
+
+    if errors:
+        raise ValidationError(errors)
+    return record
+
+
+def valid_rows(df):
+    """Mask of the rows of a training frame whose features are all present and satisfy the schema."""
+    mask = np.ones(len(df), dtype=bool)
+    for name in FIELDS:
+        if name in df:
+            mask &= ~invalid_mask(name, df[name])
+    return mask
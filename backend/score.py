@@ -0,0 +1,269 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_loader import NA_VALUES, _rebatch
+from schema import build_batch_frame
+from units import convert_yield_array
+
+# Bulk scoring of whole datasets.
+#
+#   python score.py INPUT OUTPUT [--workers N] [--chunk-size ROWS] [--resume]
+#
+# INPUT is a CSV file or a Parquet file / dataset directory with the API's
+# input fields (plus optional Area_Unit / Yield_Unit columns). It is read in
+# chunks; each chunk is validated, scored and unit-converted exactly like a
+# /predict/batch request, by a pool of processes that each load the model
+# once. Results are written in input order as they complete, to a CSV file or
+# a Parquet dataset directory (one part file per chunk), and a checkpoint
+# next to the output records how many rows are done, so an interrupted run
+# continues where it stopped with --resume.
+
+CHUNK_SIZE = 100_000
+
+
+def score_frame(model, raw, keep=()):
+    """Score a raw chunk; one output row per input row, in order.
+
+    Invalid rows get NaN results and their field errors as JSON in 'errors'.
+    Columns named in keep (e.g. a plot id) are copied from the input.
+    """
+    raw = raw.reset_index(drop=True)
+    df, _, yield_units, errors = build_batch_frame(raw)
+    valid = np.ones(len(df), dtype=bool)
+    valid[list(errors)] = False
+
+    prediction_per_ha = np.full(len(df), np.nan)
+    if valid.any():
+        prediction_per_ha[valid] = model.predict(df[valid])
+
+    area_ha = df['Area'].to_numpy()
+    result = pd.DataFrame({name: raw[name] for name in keep})
+    result['Yield_per_Hectare'] = np.round(convert_yield_array(prediction_per_ha, yield_units), 3)
+    result['Total_Yield'] = np.round(convert_yield_array(prediction_per_ha * area_ha, yield_units), 3)
+    result['Yield_Unit'] = yield_units
+    result['Area_in_Hectares'] = np.round(area_ha, 3)
+    result['errors'] = pd.Series([json.dumps(errors[i]) if i in errors else None for i in range(len(df))]
+                                 if errors else None, index=result.index, dtype=object)
+    return result
+
+
+def _skip_batches(record_batches, skip):
+    for batch in record_batches:
+        if skip:
+            if batch.num_rows <= skip:
+                skip -= batch.num_rows
+                continue
+            batch, skip = batch.slice(skip), 0
+        yield batch
+
+
+def iter_input(path, chunk_size=CHUNK_SIZE, skip=0):
+    """Yield (first row number, raw DataFrame) chunks of the input, starting after `skip` rows."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq') or os.path.isdir(path):
+        import pyarrow.dataset as ds
+        # data_engine writes hive-partitioned directories (Crop_Type=.../Season=...)
+        dataset = ds.dataset(path, format='parquet', partitioning='hive' if os.path.isdir(path) else None)
+        start = skip
+        for chunk in _rebatch(_skip_batches(dataset.to_batches(batch_size=chunk_size), skip), chunk_size):
+            yield start, chunk
+            start += len(chunk)
+    else:
+        # Text columns stay strings ('None' is a real Fertilizer_Type); skipped
+        # rows are dropped by the parser without building a DataFrame
+        chunks = pd.read_csv(path, chunksize=chunk_size, keep_default_na=False, na_values=NA_VALUES, low_memory=False,
+                             skiprows=(lambda i: 0 < i <= skip) if skip else None)
+        start = skip
+        for chunk in chunks:
+            yield start, chunk
+            start += len(chunk)
+
+
+class ResultWriter:
+    """Appends scored chunks to a CSV file or a Parquet dataset directory, in order."""
+
+    def __init__(self, path, resume_state=None):
+        self.path = path
+        self.parquet = os.path.splitext(path)[1].lower() in ('.parquet', '.pq')
+        state = resume_state or {}
+        if self.parquet:
+            os.makedirs(path, exist_ok=True)
+            done = state.get('rows_done', 0)
+            for name in os.listdir(path):
+                # Parts past the checkpoint are from chunks that were not recorded as done
+                if name.startswith('part-') and int(name[5:17]) >= done:
+                    os.remove(os.path.join(path, name))
+        else:
+            self.file = open(path, 'r+b' if state else 'wb')
+            self.file.truncate(state.get('output_bytes', 0))
+            self.file.seek(0, os.SEEK_END)
+            self.header = not state
+
+    def write(self, start, result):
+        if self.parquet:
+            part = os.path.join(self.path, f'part-{start:012d}.parquet')
+            result.to_parquet(part + '.tmp', index=False)
+            os.replace(part + '.tmp', part)
+            return 0
+        result.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        if not self.parquet:
+            self.file.close()
+
+
+def read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(path, state):
+    staging = f'{path}.{os.getpid()}'
+    with open(staging, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(staging, path)
+
+
+def limit_threads(model, n_threads):
+    # Several scoring processes share the cores; keep XGBoost from oversubscribing them
+    if model.compiled is not None and model.compiled.booster is not None:
+        model.compiled.booster.set_param({'nthread': n_threads})
+    elif model.pipeline is not None:
+        model.pipeline.steps[-1][1].set_params(n_jobs=n_threads)
+
+
+_worker_model = None
+
+
+def _init_worker(model_args, n_threads):
+    global _worker_model
+    from model_bundle import load_serving_model
+    _worker_model = load_serving_model(*model_args)
+    limit_threads(_worker_model, n_threads)
+
+
+def _score_task(task):
+    start, raw, keep = task
+    return start, score_frame(_worker_model, raw, keep)
+
+
+def score_file(input_path, output_path, model_args, workers=1, chunk_size=CHUNK_SIZE, keep=(),
+               checkpoint_path=None, resume=False, model_version=None, progress_every=10.0):
+    """Score input_path into output_path; returns (rows scored in this run, rows failed, seconds).
+
+    model_args are load_serving_model's arguments; every worker loads the
+    model from them once. At most 2 x workers chunks are in flight, so memory
+    is bounded by the chunk size, not the input size.
+    """
+    checkpoint_path = checkpoint_path or output_path + '.checkpoint.json'
+    state = read_checkpoint(checkpoint_path) if resume else None
+    if state is not None:
+        if state['input'] != os.path.abspath(input_path) or state['model_version'] != model_version:
+            raise ValueError(f"Checkpoint {checkpoint_path} is for {state['input']} scored with model "
+                             f"{state['model_version']}; not resuming")
+        print(f"Resuming after {state['rows_done']:,} rows")
+    rows_done = state['rows_done'] if state else 0
+    failed_total = state.get('rows_failed', 0) if state else 0
+
+    writer = ResultWriter(output_path, state)
+    n_threads = max(1, (os.cpu_count() or 1) // workers)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(model_args, n_threads)) if workers > 1 else None
+    if pool is None:
+        _init_worker(model_args, n_threads)
+
+    started = last_report = time.perf_counter()
+    scored = failed = 0
+    pending = deque()
+
+    def finish(start, result):
+        nonlocal rows_done, scored, failed, last_report
+        output_bytes = writer.write(start, result)
+        rows_done = start + len(result)
+        scored += len(result)
+        failed += int(result['errors'].notna().sum())
+        write_checkpoint(checkpoint_path, {
+            'input': os.path.abspath(input_path),
+            'output': os.path.abspath(output_path),
+            'model_version': model_version,
+            'rows_done': rows_done,
+            'rows_failed': failed_total + failed,
+            'output_bytes': output_bytes
+        })
+        now = time.perf_counter()
+        if now - last_report >= progress_every:
+            print(f"{rows_done:,} rows done, {scored / (now - started):,.0f} rows/s")
+            last_report = now
+
+    try:
+        for start, raw in iter_input(input_path, chunk_size, skip=rows_done):
+            if pool is None:
+                finish(start, score_frame(_worker_model, raw, keep))
+                continue
+            pending.append(pool.submit(_score_task, (start, raw, keep)))
+            # Results are written in submission order, so the output follows the input
+            while len(pending) >= 2 * workers or (pending and pending[0].done()):
+                finish(*pending.popleft().result())
+        while pending:
+            finish(*pending.popleft().result())
+    finally:
+        for future in pending:
+            future.cancel()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        writer.close()
+
+    os.remove(checkpoint_path)
+    return scored, failed_total + failed, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from model_registry import current_version, resolve
+
+    parser = argparse.ArgumentParser(description="Score a CSV / Parquet dataset with the served model")
+    parser.add_argument('input', help="CSV file or Parquet file / dataset directory")
+    parser.add_argument('output', help="CSV file, or Parquet dataset directory if it ends in .parquet")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--keep', nargs='+', default=[], help="Input columns to copy to the output, e.g. an id")
+    parser.add_argument('--resume', action='store_true', help="Continue from the output's checkpoint")
+    parser.add_argument('--checkpoint', default=None, help="Checkpoint file (default: OUTPUT.checkpoint.json)")
+    parser.add_argument('--model-registry', default=os.environ.get('MODEL_REGISTRY', 'models/crop_yield_xgb'))
+    parser.add_argument('--model-version', default=None, help="Registry version (default: current)")
+    parser.add_argument('--model-path', default='models/crop_yield_xgb.pkl', help="Pickle to use without a registry")
+    parser.add_argument('--model-format', choices=['auto', 'bundle', 'pickle', 'edge'],
+                        default=os.environ.get('MODEL_FORMAT', 'auto'))
+    parser.add_argument('--edge-model', default=os.environ.get('EDGE_MODEL_PATH', 'models/crop_yield_edge.npz'),
+                        help="NumPy-only edge model, for --model-format edge or when XGBoost cannot be loaded")
+    args = parser.parse_args()
+
+    checkpoint = read_checkpoint(args.checkpoint or args.output + '.checkpoint.json') if args.resume else None
+    if args.model_format == 'pickle':
+        bundle_path, version = args.model_registry, str(os.path.getmtime(args.model_path))
+    elif args.model_format == 'edge':
+        bundle_path, version = args.model_registry, f'edge:{os.path.getmtime(args.edge_model)}'
+    else:
+        # A resumed run keeps scoring with the version it started with
+        version = args.model_version or (checkpoint or {}).get('model_version') or current_version(args.model_registry)
+        bundle_path = resolve(args.model_registry, version)
+    model_args = (bundle_path, args.model_path, args.model_format, True, args.edge_model)
+
+    scored, failed, seconds = score_file(args.input, args.output, model_args, max(1, args.workers),
+                                         args.chunk_size, args.keep, args.checkpoint, args.resume, version)
+    print(f"Scored {scored:,} rows in {seconds:.1f}s ({scored / max(seconds, 1e-9):,.0f} rows/s), "
+          f"{failed:,} failed; results in {args.output}")
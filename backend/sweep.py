@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# What-if sweeps: one base record plus a list of values for each varied field.
+#
+# The grid is the Cartesian product of the varied fields' values, in C order
+# (the last field varies fastest). It is never materialised as records: a
+# chunk of flat grid positions is unravelled into per-field indices and each
+# column is gathered from its value array, so scoring a chunk is one frame
+# build and one model call, and memory is bounded by the chunk size.
+
+MAX_VALUES_PER_FIELD = 1000
+
+
+def expand_values(name, spec, numeric):
+    """Values for one varied field.
+
+    spec is a list of values, or for numeric fields a range:
+    {"start", "stop", "step"} (stop inclusive) or {"start", "stop", "num"}.
+    Raises ValueError with a message naming the field.
+    """
+    if isinstance(spec, dict):
+        if not numeric:
+            raise ValueError(f"'{name}' is categorical; give a list of values")
+        try:
+            if isinstance(spec['start'], bool) or isinstance(spec['stop'], bool):
+                raise TypeError
+            start, stop = float(spec['start']), float(spec['stop'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"'{name}' range needs numeric 'start' and 'stop'")
+        if 'num' in spec:
+            num = int(spec['num'])
+            if not 1 <= num <= MAX_VALUES_PER_FIELD:
+                raise ValueError(f"'{name}' num must be between 1 and {MAX_VALUES_PER_FIELD}")
+            values = np.linspace(start, stop, num)
+        else:
+            step = float(spec.get('step', 1))
+            if step <= 0 or stop < start:
+                raise ValueError(f"'{name}' range needs start <= stop and a positive step")
+            if (stop - start) / step + 1 > MAX_VALUES_PER_FIELD:
+                raise ValueError(f"'{name}' range has more than {MAX_VALUES_PER_FIELD} values")
+            # Half a step of slack so float rounding does not drop `stop`
+            values = np.arange(start, stop + step / 2, step)
+    elif isinstance(spec, list) and spec:
+        if len(spec) > MAX_VALUES_PER_FIELD:
+            raise ValueError(f"'{name}' has more than {MAX_VALUES_PER_FIELD} values")
+        if numeric:
+            values = pd.to_numeric(pd.Series(spec, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+            # to_numeric turns true/false into 1.0/0.0; the schema rejects booleans
+            if not np.isfinite(values).all() or any(isinstance(v, bool) for v in spec):
+                raise ValueError(f"'{name}' values must be numbers")
+        else:
+            if not all(isinstance(v, str) for v in spec):
+                raise ValueError(f"'{name}' values must be strings")
+            values = np.array(spec, dtype=object)
+    else:
+        raise ValueError(f"'{name}' must be a non-empty list or a range object")
+    return values
+
+
+class Grid:
+    """Cartesian product of varied field values over a fixed base record."""
+
+    def __init__(self, base, axes, labels=None):
+        # base: full input record; axes: {field: value array}, in grid order, as
+        # the model reads them; labels: {field: the same values as the caller gave
+        # them} for fields converted to model units (e.g. Area into hectares)
+        self.base = base
+        self.fields = list(axes)
+        self.axes = [axes[name] for name in self.fields]
+        self.labels = [(labels or {}).get(name, axes[name]) for name in self.fields]
+        self.shape = tuple(len(values) for values in self.axes)
+        self.size = int(np.prod(self.shape, dtype=np.int64))
+
+    def frame(self, start, stop):
+        """Input rows for flat grid positions [start, stop) as a DataFrame."""
+        n = stop - start
+        index = np.unravel_index(np.arange(start, stop), self.shape) if self.fields else ()
+        columns = {}
+        for name, value in self.base.items():
+            columns[name] = np.full(n, value, dtype=object if isinstance(value, str) or value is None else np.float64)
+        for name, values, positions in zip(self.fields, self.axes, index):
+            columns[name] = values[positions]
+        return pd.DataFrame(columns)
+
+    def config(self, position):
+        """The varied field values at one flat grid position, in the caller's units."""
+        index = np.unravel_index(position, self.shape)
+        return {name: _scalar(values[i]) for name, values, i in zip(self.fields, self.labels, index)}
+
+    def chunks(self, chunk_size):
+        for start in range(0, self.size, chunk_size):
+            yield start, min(start + chunk_size, self.size)
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def axis_values(values):
+    """JSON-safe list of an axis' values."""
+    return [_scalar(v) for v in values]
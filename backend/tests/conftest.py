@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The backend modules are imported as top-level modules, as when the scripts run from backend/
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
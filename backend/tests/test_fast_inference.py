@@ -0,0 +1,51 @@
+"""Parity of the compiled inference path against the saved sklearn Pipeline.
+
+Run from backend/:  python -m pytest tests
+"""
+import os
+
+import numpy as np
+import pytest
+
+joblib = pytest.importorskip('joblib')
+pytest.importorskip('xgboost')
+
+from data_engine import generate_shard
+from fast_inference import check_parity, compile_pipeline, model_input_columns
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'models', 'crop_yield_xgb.pkl')
+
+
+@pytest.fixture(scope='module')
+def pipeline():
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip(f"no model at {MODEL_PATH}")
+    return joblib.load(MODEL_PATH)
+
+
+@pytest.fixture(scope='module')
+def compiled(pipeline):
+    return compile_pipeline(pipeline)
+
+
+def test_parity_on_probe_rows(pipeline, compiled):
+    # Every known category plus unseen and missing ones; raises on a mismatch
+    assert check_parity(pipeline, compiled) < 1e-4
+
+
+def test_matches_pipeline_on_generated_rows(pipeline, compiled):
+    frame = generate_shard(np.random.SeedSequence(7), 2000)[model_input_columns(pipeline)]
+    expected = np.asarray(pipeline.predict(frame), dtype=np.float64)
+
+    np.testing.assert_allclose(compiled.predict(frame), expected, rtol=1e-5, atol=1e-4)
+    single = [compiled.predict_row(row) for row in frame.head(100).to_dict('records')]
+    np.testing.assert_allclose(single, expected[:100], rtol=1e-5, atol=1e-4)
+
+
+def test_matches_pipeline_on_float32_columns(pipeline, compiled):
+    # data_loader types numerics as float32; StandardScaler then scales in float32 and so must the encoder
+    frame = generate_shard(np.random.SeedSequence(11), 2000)[model_input_columns(pipeline)]
+    frame = frame.astype({name: np.float32 for name in compiled.numeric_columns})
+
+    np.testing.assert_allclose(compiled.predict(frame), pipeline.predict(frame), rtol=1e-5, atol=1e-4)
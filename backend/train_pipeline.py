@@ -1,81 +1,149 @@
-import pandas as pd
+import argparse
+import time
+
 import numpy as np
 import joblib
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.compose import ColumnTransformer
+from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from xgboost import XGBRegressor
 from sklearn.metrics import mean_squared_error, r2_score
 
-# 1. Load Data
-print("Loading dataset...")
-df = pd.read_csv('data/merged_agricultural_data.csv')
-
-# 2. EDA & Cleaning (Simplified for script)
-# Remove realistic outliers (e.g. negative yields or impossible pH) -> Generator handles most, but good practice
-df = df[df['Yield_per_Hectare'] > 0]
-df = df[(df['Soil_pH'] > 0) & (df['Soil_pH'] < 14)]
-
-# Save basic correlation plot for user
-plt.figure(figsize=(10, 8))
-numeric_df = df.select_dtypes(include=[np.number])
-sns.heatmap(numeric_df.corr(), annot=False, cmap='coolwarm')
-plt.title("Feature Correlation Matrix")
-plt.savefig("data/correlation_matrix.png")
-print("Saved correlation matrix to data/correlation_matrix.png")
-
-# 3. Prepare Pipeline
-X = df.drop(columns=['Yield_per_Hectare', 'Cluster_Label', 'Area']) # Area is linear scaling, not yield driver per se
-y = df['Yield_per_Hectare']
-
-categorical_features = ['Crop_Type', 'Soil_Type', 'Fertilizer_Type', 'Irrigation_Method', 'Season']
-numerical_features = [
-    'Nitrogen', 'Phosphorus', 'Potassium', 'Soil_pH', 'Soil_Moisture', 
-    'Temperature', 'Rainfall', 'Humidity', 'Sunlight_Hours', 'Fertilizer_Dosage', 
-    'Growth_Duration'
-]
-
-preprocessor = ColumnTransformer(
-    transformers=[
-        ('num', StandardScaler(), numerical_features),
-        ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features)
-    ])
-
-# 4. XGBoost Model with optimization
-xgb = XGBRegressor(objective='reg:squarederror', n_jobs=-1, random_state=42)
-
-pipeline = Pipeline(steps=[('preprocessor', preprocessor),
-                           ('model', xgb)])
-
-# Grid Search for Tuning (Simplified)
-param_grid = {
-    'model__n_estimators': [100, 200],
-    'model__learning_rate': [0.05, 0.1],
-    'model__max_depth': [5, 7]
-}
-
-print("Starting Grid Search for Hyperparameter Tuning...")
-search = GridSearchCV(pipeline, param_grid, cv=3, scoring='r2', verbose=1)
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-search.fit(X_train, y_train)
-best_model = search.best_estimator_
-
-# 5. Evaluation
-y_pred = best_model.predict(X_test)
-r2 = r2_score(y_test, y_pred)
-rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-
-print(f"\nTraining Complete.")
-print(f"Best Params: {search.best_params_}")
-print(f"R2 Score: {r2:.4f}")
-print(f"RMSE: {rmse:.4f}")
+from data_loader import iter_chunks, load_dataset, CATEGORICAL_FEATURES, NUMERICAL_FEATURES, TARGET
+from edge_model import export_edge_model, print_report
+from fast_inference import compile_pipeline, model_input_columns
+from hyperparam_search import prepare_folds, sample_configs, successive_halving
+from model_registry import publish
+from out_of_core import clean_chunk, train_out_of_core
+from preprocessing import build_preprocessor, xgb_feature_types
+from schema import valid_rows
+
+parser = argparse.ArgumentParser(description="Train the XGBoost crop yield pipeline")
+parser.add_argument('--trials', type=int, default=18, help="Configurations sampled for successive halving")
+parser.add_argument('--eta', type=int, default=3, help="Keep the best 1/eta configs at each rung")
+parser.add_argument('--min-rounds', type=int, default=40, help="Boosting rounds at the first rung")
+parser.add_argument('--max-rounds', type=int, default=400, help="Boosting rounds at the last rung")
+parser.add_argument('--n-parallel', type=int, default=None, help="Concurrent trials (default: all cores)")
+parser.add_argument('--data', default='data/merged_agricultural_data.csv', help="CSV, Parquet or Feather dataset")
+parser.add_argument('--out-of-core', action='store_true',
+                    help="Stream the dataset in chunks instead of loading it into memory")
+parser.add_argument('--chunk-size', type=int, default=500_000, help="Rows per chunk in out-of-core mode")
+parser.add_argument('--cache-dir', default='data/xgb_cache', help="XGBoost external-memory cache directory")
+parser.add_argument('--matrix', choices=['quantile', 'external'], default='quantile',
+                    help="Out-of-core matrix: compressed in-RAM QuantileDMatrix or on-disk external memory")
+parser.add_argument('--rounds', type=int, default=500, help="Maximum boosting rounds in out-of-core mode")
+parser.add_argument('--registry', default='models/crop_yield_xgb',
+                    help="Model registry the serving bundle (native booster + JSON manifest) is published to")
+parser.add_argument('--no-activate', action='store_true',
+                    help="Publish the bundle without making it the version the API serves")
+parser.add_argument('--continue-from', default=None,
+                    help="Existing pipeline .pkl to keep boosting from (out-of-core mode), e.g. for a new season's data")
+parser.add_argument('--edge-model', default='models/crop_yield_edge.npz',
+                    help="NumPy-only edge export of the model ('' to skip)")
+parser.add_argument('--leaf-bits', type=int, choices=[8, 16, 32], default=16,
+                    help="Leaf value precision of the edge export")
+args = parser.parse_args()
+
+categorical_features = CATEGORICAL_FEATURES
+numerical_features = [name for name in NUMERICAL_FEATURES if name != 'Area']
+
+
+def train_in_memory(args):
+    # 1. Load Data
+    print("Loading dataset...")
+    # Typed, projected load: Cluster_Label is EDA-only and never read
+    df = load_dataset(args.data,
+                      columns=CATEGORICAL_FEATURES + NUMERICAL_FEATURES + [TARGET])
+
+    # 2. EDA & Cleaning (Simplified for script)
+    # Drop non-positive yields and rows the API would reject (schema ranges and categories, e.g. pH outside 0-14)
+    df = df[(df['Yield_per_Hectare'] > 0).to_numpy() & valid_rows(df)]
+
+    # Save basic correlation plot for user
+    plt.figure(figsize=(10, 8))
+    numeric_df = df.select_dtypes(include=[np.number])
+    sns.heatmap(numeric_df.corr(), annot=False, cmap='coolwarm')
+    plt.title("Feature Correlation Matrix")
+    plt.savefig("data/correlation_matrix.png")
+    print("Saved correlation matrix to data/correlation_matrix.png")
+
+    # 3. Prepare Pipeline
+    X = df.drop(columns=[TARGET, 'Area']) # Area is linear scaling, not yield driver per se
+    y = df[TARGET]
+
+    # Tree-optimized: unscaled numerics + float32 ordinal codes instead of a float64 one-hot matrix;
+    # XGBoost splits on the codes as categories natively
+    preprocessor = build_preprocessor(numerical_features, categorical_features)
+
+    # 4. Hyperparameter search: successive halving with early stopping.
+    # The preprocessor is fitted once per CV fold and the encoded folds are shared by all trials.
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    categorical_params = {
+        'enable_categorical': True,
+        'feature_types': xgb_feature_types(preprocessor)
+    }
+
+    print("Starting successive-halving search for Hyperparameter Tuning...")
+    search_start = time.perf_counter()
+    folds = prepare_folds(preprocessor, X_train, y_train, n_splits=3)
+    best_params, best_rounds, history = successive_halving(
+        folds, sample_configs(args.trials), eta=args.eta, min_rounds=args.min_rounds,
+        max_rounds=args.max_rounds, n_parallel=args.n_parallel, model_params=categorical_params)
+    print(f"Search finished: {len(history)} trials in {time.perf_counter() - search_start:.1f}s")
+
+    # Refit the winner on the full training split with its early-stopped round count
+    xgb = XGBRegressor(objective='reg:squarederror', tree_method='hist', n_estimators=best_rounds,
+                       n_jobs=-1, random_state=42, **best_params, **categorical_params)
+
+    best_model = Pipeline(steps=[('preprocessor', preprocessor),
+                                 ('model', xgb)])
+    best_model.fit(X_train, y_train)
+
+    # 5. Evaluation
+    y_pred = best_model.predict(X_test)
+    r2 = r2_score(y_test, y_pred)
+    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+
+    print(f"\nTraining Complete.")
+    print(f"Best Params: {dict(best_params, n_estimators=best_rounds)}")
+    print(f"R2 Score: {r2:.4f}")
+    print(f"RMSE: {rmse:.4f}")
+
+    return best_model, X_test, y_test
+
+
+if args.out_of_core:
+    best_model = train_out_of_core(
+        args.data, numerical_features, categorical_features, chunk_size=args.chunk_size,
+        cache_dir=args.cache_dir, matrix=args.matrix, num_rounds=args.rounds,
+        base_pipeline=joblib.load(args.continue_from) if args.continue_from else None)
+    # The edge export is compared on a sample from the start of the data (no held-out split here)
+    columns = numerical_features + categorical_features + [TARGET]
+    sample = clean_chunk(next(iter_chunks(args.data, 20000, columns=columns)))
+    X_test, y_test = sample.drop(columns=[TARGET]), sample[TARGET]
+else:
+    best_model, X_test, y_test = train_in_memory(args)
 
 # 6. Save Artifacts
 joblib.dump(best_model, 'models/crop_yield_xgb.pkl')
 print("Saved model to models/crop_yield_xgb.pkl")
 
+# Serving bundle: loads without unpickling sklearn objects and outlives library upgrades.
+# Running APIs pick up the new current version without a restart.
+manifest = publish(best_model, args.registry, make_current=not args.no_activate)
+print(f"Published model bundle {manifest['version']} to {args.registry}"
+      f"{'' if args.no_activate else ' (now current)'}")
+
+# Edge export: the trees flattened into NumPy arrays with quantized leaves, for
+# offline devices without XGBoost and as the API's fallback model. Reported
+# against the full pipeline on the test rows.
+if args.edge_model:
+    edge, report = export_edge_model(compile_pipeline(best_model), model_input_columns(best_model),
+                                     args.edge_model, manifest['version'], args.leaf_bits,
+                                     reference=best_model, frame=X_test, y=y_test)
+    print(f"Exported edge model ({edge.n_trees} trees, depth {edge.depth}, {args.leaf_bits}-bit leaves) "
+          f"to {args.edge_model}")
+    print_report(report)
+
 # Save feature importance plot (Tricky with Pipeline, skipping complex extraction for now)
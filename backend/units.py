@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+# Conversion factors, keyed by lower-cased unit name.
+# Unknown units fall back to a factor of 1.0 (i.e. treated as the base unit).
+AREA_TO_HECTARE = {
+    'hectare': 1.0,
+    'acre': 0.404686,
+    'sq_meter': 0.0001
+}
+
+# Yield is predicted in tons/ha
+TON_TO_YIELD_UNIT = {
+    'ton': 1.0,
+    'kg': 1000.0,
+    'quintal': 10.0
+}
+
+
+def convert_area_to_hectare(area, unit):
+    return area * AREA_TO_HECTARE.get(unit.lower(), 1.0)
+
+
+def convert_yield(yield_val, target_unit):
+    return yield_val * TON_TO_YIELD_UNIT.get(target_unit.lower(), 1.0)
+
+
+def _unit_factors(units, table):
+    # Map a whole array of unit names to factors in one pass
+    units = pd.Series(units, dtype=object).str.lower()
+    return units.map(table).fillna(1.0).to_numpy(dtype=np.float64)
+
+
+def convert_area_to_hectare_array(areas, units):
+    return np.asarray(areas, dtype=np.float64) * _unit_factors(units, AREA_TO_HECTARE)
+
+
+def convert_yield_array(yield_vals, target_units):
+    return np.asarray(yield_vals, dtype=np.float64) * _unit_factors(target_units, TON_TO_YIELD_UNIT)